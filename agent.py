@@ -1,31 +1,97 @@
+import argparse
+import asyncio
+import atexit
+import functools
+import glob
+import hashlib
+import http.client
+import io
 import json
+import mmap
 import os
+import random
 import re
 import subprocess
 import sys
-import shlex
+import shutil
+import tempfile
 import logging
 import threading
+import time
+from collections import Counter
+from itertools import chain
+from typing import NamedTuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 
-import logging
 import fcntl
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 
 # Thread-level locks per repository path
 # fcntl.flock() only provides inter-process locking, not intra-process (thread) locking
 # FastAPI runs sync endpoints in a thread pool, so we need both:
-# - threading.Lock() for thread synchronization within the same process
+# - _RepoRWLock for thread synchronization within the same process
 # - fcntl.flock() for process synchronization across different processes
-_repo_thread_locks: dict[str, threading.Lock] = {}
-_repo_thread_locks_lock = threading.Lock()  # Lock to protect the dict itself
+class _RepoRWLock:
+    """
+    Readers-writer lock for one repository: any number of shared holders or a single
+    exclusive holder. Waiting writers block new readers, so writers are not starved.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+        # All shared holders in this process use one flock on the same descriptor;
+        # the first takes it and the last releases it
+        self._flock_mutex = threading.Lock()
+        self._flock_holders = 0
+
+    def acquire(self, exclusive: bool):
+        with self._cond:
+            if exclusive:
+                self._writers_waiting += 1
+                while self._writer or self._readers:
+                    self._cond.wait()
+                self._writers_waiting -= 1
+                self._writer = True
+            else:
+                while self._writer or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+
+    def release(self, exclusive: bool):
+        with self._cond:
+            if exclusive:
+                self._writer = False
+            else:
+                self._readers -= 1
+            self._cond.notify_all()
 
+    def flock_shared(self, fd: int):
+        with self._flock_mutex:
+            if self._flock_holders == 0:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            self._flock_holders += 1
 
-def _get_thread_lock(repo_path: str) -> threading.Lock:
-    """Get or create a thread lock for the given repo path."""
-    with _repo_thread_locks_lock:
-        if repo_path not in _repo_thread_locks:
-            _repo_thread_locks[repo_path] = threading.Lock()
-        return _repo_thread_locks[repo_path]
+    def funlock_shared(self, fd: int):
+        with self._flock_mutex:
+            self._flock_holders -= 1
+            if self._flock_holders == 0:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+# dict.get/setdefault are atomic, so the dict itself needs no lock
+_repo_thread_locks: dict[str, _RepoRWLock] = {}
+
+
+def _get_thread_lock(repo_path: str) -> _RepoRWLock:
+    """Get or create the thread-level lock for the given repo path."""
+    lock = _repo_thread_locks.get(repo_path)
+    if lock is None:
+        # If two threads race here, setdefault makes both use whichever lock was stored first
+        lock = _repo_thread_locks.setdefault(repo_path, _RepoRWLock())
+    return lock
 
 # Configure logging
 LOG_FILE = "/tmp/codemedic.log"
@@ -39,98 +105,225 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def set_log_level(level):
+    """Set the root log level; importing this module has already installed the handlers."""
+    logging.getLogger().setLevel(level)
+
+# Open lock file descriptors per repository path, kept for the life of the process
+_repo_lock_fds: dict[str, int] = {}
+
+
+def _get_lock_fd(repo_path: str) -> int:
+    """
+    Get the descriptor of the repo's lock file, opening (and creating) it on first use.
+    Shared holders may get here together, so only the first stored descriptor is kept.
+    """
+    fd = _repo_lock_fds.get(repo_path)
+    if fd is None:
+        git_dir = os.path.join(repo_path, ".git")
+        os.makedirs(git_dir, exist_ok=True)
+        lock_file_path = os.path.join(git_dir, "codemedic_ops.lock")
+        new_fd = os.open(lock_file_path, os.O_CREAT | os.O_RDWR, 0o644)
+        fd = _repo_lock_fds.setdefault(repo_path, new_fd)
+        if fd != new_fd:
+            os.close(new_fd)
+    return fd
+
+
+@atexit.register
+def _close_lock_fds():
+    """Close the cached lock file descriptors at interpreter exit."""
+    for fd in _repo_lock_fds.values():
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+    _repo_lock_fds.clear()
+
 @contextmanager
-def repo_lock(repo_path):
+def repo_lock(repo_path, exclusive=True):
     """
-    Context manager to acquire an exclusive lock on a repository.
+    Context manager to acquire a lock on a repository.
     Prevents concurrent operations from multiple requests corrupting the repo state.
+    Pass exclusive=False for read-only git operations: they share the lock with
+    each other and only wait for (and block) writers.
 
     Uses two-level locking:
-    1. threading.Lock() - for thread synchronization within the same process
+    1. _RepoRWLock - for thread synchronization within the same process
        (FastAPI runs sync endpoints in a thread pool)
     2. fcntl.flock() - for process synchronization across different processes
-       (in case multiple server instances are running)
+       (in case multiple server instances are running); LOCK_SH for readers, LOCK_EX for writers
     """
+    mode = "exclusive" if exclusive else "shared"
     # First, acquire the thread-level lock (handles concurrent threads in same process)
     thread_lock = _get_thread_lock(repo_path)
 
-    logger.debug(f"⏳ Acquiring thread lock for {repo_path}...")
-    thread_lock.acquire()
-    logger.debug(f"🔒 Thread lock acquired for {repo_path}")
+    logger.debug(f"⏳ Acquiring {mode} thread lock for {repo_path}...")
+    thread_lock.acquire(exclusive)
+    logger.debug(f"🔒 {mode.capitalize()} thread lock acquired for {repo_path}")
 
     try:
         # Then, acquire the file-level lock (handles concurrent processes)
-        git_dir = os.path.join(repo_path, ".git")
-        if not os.path.exists(git_dir):
-            os.makedirs(git_dir, exist_ok=True)
-
-        lock_file_path = os.path.join(git_dir, "codemedic_ops.lock")
-
-        # Open file for writing (creates if not exists)
-        lock_file = open(lock_file_path, 'w')
-
+        lock_fd = _get_lock_fd(repo_path)
+        logger.debug(f"⏳ Acquiring {mode} file lock for {repo_path}...")
+        # This will BLOCK until the lock is available
+        if exclusive:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        else:
+            thread_lock.flock_shared(lock_fd)
+        logger.debug(f"🔒 {mode.capitalize()} file lock acquired for {repo_path}")
         try:
-            logger.debug(f"⏳ Acquiring file lock for {repo_path}...")
-            # LOCK_EX: Exclusive lock. This will BLOCK until lock is available.
-            fcntl.flock(lock_file, fcntl.LOCK_EX)
-            logger.debug(f"🔒 File lock acquired for {repo_path}")
             yield
         finally:
-            # Unlock and close file lock
+            # Unlock; the descriptor stays open for the next acquire
             try:
-                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                if exclusive:
+                    fcntl.flock(lock_fd, fcntl.LOCK_UN)
+                else:
+                    thread_lock.funlock_shared(lock_fd)
             except Exception:
                 pass
-            lock_file.close()
-            logger.debug(f"🔓 File lock released for {repo_path}")
+            logger.debug(f"🔓 {mode.capitalize()} file lock released for {repo_path}")
     finally:
         # Always release thread lock
-        thread_lock.release()
-        logger.debug(f"🔓 Thread lock released for {repo_path}")
+        thread_lock.release(exclusive)
+        logger.debug(f"🔓 {mode.capitalize()} thread lock released for {repo_path}")
+
+
+@asynccontextmanager
+async def repo_lock_async(repo_path, exclusive=True):
+    """
+    repo_lock for coroutines: the blocking acquire runs in a worker thread, so the
+    event loop keeps serving other requests while this one waits for the repo.
+    """
+    lock = repo_lock(repo_path, exclusive)
+    entering = asyncio.ensure_future(asyncio.to_thread(lock.__enter__))
+    try:
+        await asyncio.shield(entering)
+    except asyncio.CancelledError:
+        # The thread still finishes acquiring; release as soon as it does
+        entering.add_done_callback(lambda f: f.exception() is None and lock.__exit__(None, None, None))
+        raise
+    try:
+        yield
+    finally:
+        lock.__exit__(None, None, None)
+
+
+def _run_git(args, cwd):
+    """
+    Run git and capture its output as raw bytes, for callers that only look at the
+    exit code or whether anything was printed; nothing is decoded that isn't read.
+    """
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True)
+
+
+async def _run_async(cmd, cwd):
+    """subprocess.run(cmd, cwd=cwd, capture_output=True, text=True) as an asyncio subprocess."""
+    process = await asyncio.create_subprocess_exec(
+        *cmd, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    # communicate() reads both pipes to EOF and then waits for the exit status
+    stdout, stderr = await process.communicate()
+    return subprocess.CompletedProcess(
+        cmd, process.returncode,
+        stdout.decode("utf-8", errors="replace"), stderr.decode("utf-8", errors="replace")
+    )
+
+# In-flight calls shared by _singleflight, keyed by (function, args)
+_inflight_calls: dict[tuple, Future] = {}
+_inflight_calls_lock = threading.Lock()
+
+
+def _singleflight(func):
+    """
+    Coalesce concurrent calls with the same arguments into one execution.
+    The first caller runs func; callers arriving while it is still running wait
+    for it and get the same result (or exception). The key is dropped when the
+    call finishes, so later calls run again.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+        with _inflight_calls_lock:
+            future = _inflight_calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = _inflight_calls[key] = Future()
+
+        if not is_leader:
+            logger.debug(f"⏳ Joining in-flight {func.__name__}{args}")
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with _inflight_calls_lock:
+                del _inflight_calls[key]
+
+    return wrapper
 
 
 # IDE files to exclude from commits and diffs
 IDE_FILE_PATTERNS = [".classpath", ".project", ".factorypath", ".settings", ".idea", ".vscode"]
+_IDE_NAMES = frozenset(IDE_FILE_PATTERNS)
+_IDE_SUFFIXES = tuple(IDE_FILE_PATTERNS)
+# Pathspec exclusions for IDE files: ':!pattern' excludes files matching pattern,
+# also anywhere in the tree and anything under a matching directory
+_IDE_EXCLUSIONS = (
+    [f":!{pattern}" for pattern in IDE_FILE_PATTERNS]
+    + [f":!**/{pattern}" for pattern in IDE_FILE_PATTERNS]
+    + [f":!**/{pattern}/**" for pattern in IDE_FILE_PATTERNS]
+)
 
 
 def is_ide_file(file_path: str) -> bool:
     """Check if a file path matches IDE file patterns."""
     normalized = file_path.replace('\\', '/')
-    parts = normalized.split('/')
-    for pattern in IDE_FILE_PATTERNS:
-        if pattern in parts or normalized.endswith(pattern):
-            return True
-    return False
+    # endswith() takes the whole tuple and isdisjoint() the split parts, so both loops run in C
+    return normalized.endswith(_IDE_SUFFIXES) or not _IDE_NAMES.isdisjoint(normalized.split('/'))
 
 
-def unstage_ide_files(repo_path: str) -> int:
-    """Unstage IDE files from git staging area. Returns count of unstaged files."""
+def unstage_ide_files(repo_path: str) -> list[str]:
+    """Unstage IDE files from git staging area. Returns the files that remain staged."""
+    # -z lists raw NUL-separated paths, without C-style quoting of unusual names
     result = subprocess.run(
-        ["git", "diff", "--cached", "--name-only"],
+        ["git", "diff", "--cached", "--name-only", "-z"],
         cwd=repo_path, capture_output=True, text=True
     )
-    staged_files = result.stdout.strip().split('\n') if result.stdout.strip() else []
+    staged_files = [path for path in result.stdout.split('\0') if path]
 
-    unstaged_count = 0
+    remaining_files = []
+    ide_files = []
     for staged_file in staged_files:
-        if is_ide_file(staged_file):
+        if not is_ide_file(staged_file):
+            remaining_files.append(staged_file)
+        else:
             logger.info(f"  Unstaging IDE file: {staged_file}")
-            # Try reset first
-            res = subprocess.run(
-                ["git", "reset", "HEAD", "--", staged_file],
-                cwd=repo_path, check=False, capture_output=True
+            ide_files.append(staged_file)
+
+    if ide_files:
+        # Unstage all IDE files in one git process rather than one per file; paths go
+        # over stdin so a large .idea/ tree cannot overflow the argument list
+        pathspec = "\0".join(ide_files) + "\0"
+        res = subprocess.run(
+            ["git", "reset", "-q", "HEAD", "--pathspec-from-file=-", "--pathspec-file-nul"],
+            cwd=repo_path, input=pathspec, text=True, check=False, capture_output=True
+        )
+        if res.returncode != 0:
+            # Fallback to git rm --cached (e.g. no HEAD commit yet)
+            subprocess.run(
+                ["git", "rm", "--cached", "--force", "-q", "--pathspec-from-file=-", "--pathspec-file-nul"],
+                cwd=repo_path, input=pathspec, text=True, check=False, capture_output=True
             )
-            if res.returncode != 0:
-                # Fallback to git rm --cached
-                subprocess.run(
-                    ["git", "rm", "--cached", "--force", "--", staged_file],
-                    cwd=repo_path, check=False, capture_output=True
-                )
-            unstaged_count += 1
-
-    if unstaged_count > 0:
-        logger.info(f"Unstaged {unstaged_count} IDE file(s)")
-    return unstaged_count
+        logger.info(f"Unstaged {len(ide_files)} IDE file(s)")
+    return remaining_files
 
 
 def load_config(config_path="config.json"):
@@ -141,71 +334,278 @@ def load_config(config_path="config.json"):
         print(f"Error: Config file not found at {config_path}")
         sys.exit(1)
 
+_ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
 def strip_ansi_codes(text):
     """Remove ANSI color codes from text."""
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    return ansi_escape.sub('', text)
+    return _ANSI_RE.sub('', text)
+
+# Regex for standard new entry (with optional prefix)
+# Matches: [Optional Prefix] [Date YYYY-MM-DD or YYYY/MM/DD]
+# Prefix: digits followed by - or :
+_ENTRY_RE = re.compile(r'^(?:(\d+[-:])\s*)?(\d{4}[-/]\d{2}[-/]\d{2})')
+# Regex to strip prefix from continuation lines
+_PREFIX_CONT_RE = re.compile(r'^\d+[-:]')
+
+# Stack trace line prefixes, matched after any leading indentation
+# Java: "at ...", "Caused by: ...", "... "
+# Python: "File "...", line ...", "Traceback (most recent call last):", "During handling of the above exception..."
+_STACK_RE = re.compile(r'\s*(?:at |Caused by:|\.\.\. |File "|Traceback \(|During handling of)')
+
+# v1 header: "v1|f1|f2|f3|f4|f5|LEVEL|f7|f8|MESSAGE|..."
+_V1_RE = re.compile(r'v1\|(?:[^|]*\|){5}(?P<level>[^|]*)\|(?:[^|]*\|){2}(?P<msg>[^|]*)')
+
+# Variable tokens that make otherwise identical errors cluster apart
+_NORMALIZE_RE = re.compile(
+    r'(?P<uuid>\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b)'
+    r'|(?P<hex>\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{16,}\b)'
+    # A single quote only opens a value after a non-word character, so the apostrophes
+    # in "can't ... won't" aren't taken for one
+    r'|(?P<str>(?<!\w)\'[^\']*\'|"[^"]*")'
+    r'|(?P<num>\b\d+\b)'
+)
 
-def parse_log_content(log_content):
-    """Parse log content from a string."""
+# Content with more than one "ERROR" per this many lines is parsed line by line in full
+ERROR_DENSE_LINES_PER_ERROR = 10
+
+# Start of a log entry, as recognised by the line parser: a dated line or a v1 header,
+# each with an optional grep-style "123-"/"123:" prefix.
+# Anchored on a literal "\n" rather than ^ with re.M, so the engine can skip ahead to
+# newlines instead of attempting a match at every character.
+_ENTRY_START = r'(?:(?:\d+[-:]\s*)?\d{4}[-/]\d{2}[-/]\d{2}|(?:\d+[-:])?v1\|)'
+_ENTRY_START_RE = re.compile(r'\n' + _ENTRY_START)
+# An entry whose header line mentions ERROR (a superset of what the parser treats as errors)
+_ERROR_ENTRY_AT_START_RE = re.compile(_ENTRY_START + r'[^\n]*?ERROR')
+_ENTRY_AT_START_RE = re.compile(_ENTRY_START)
+
+def parse_log_content(log_content, limit=None):
+    """Parse log content from a string, returning at most limit clusters if set."""
     print(f"Parsing log content ({len(log_content)} chars)")
-    error_data = {} # Map msg -> {'count': int, 'trace': str}
+    if "\x1b" in log_content:
+        # Strip escape codes once over the whole buffer; none of them can span a newline
+        log_content = _ANSI_RE.sub('', log_content)
+    lines = _error_block_lines(log_content)
+    if log_content.endswith("\n"):
+        # Splitting the whole string leaves an empty last line, which an open trace keeps
+        lines = chain(lines, ("",))
+    return _parse_log_lines(lines, strip_ansi=False, limit=limit)
+
+def _error_blocks(log_content, pending=False):
+    """
+    Yield lists of lines covering only those entries whose header mentions ERROR.
+    Error headers and entry boundaries are located with C-level string and regex
+    searches, so the continuation lines of INFO/WARN entries (usually most of a log) never reach the per-line parser.
+    Skipping them is safe once the parser has no open block, so each error span is
+    followed by the header line of the entry that closes it.
+
+    With pending=True the content may continue a block left open by earlier input:
+    its leading continuation lines and the first header are passed through as well.
+    """
+    search_entry = _ENTRY_START_RE.search
+    content_len = len(log_content)
+
+    # When errors are dense there is little to skip, and finding the spans costs more
+    # than it saves; every line is then handed to the parser as one block
+    if log_content.count("ERROR") * ERROR_DENSE_LINES_PER_ERROR > log_content.count("\n"):
+        yield _split_block(log_content, 0, content_len)
+        return
+
+    def line_end(pos):
+        end = log_content.find('\n', pos)
+        return content_len if end == -1 else end + 1
+
+    def next_entry_start(pos):
+        match = search_entry(log_content, pos)
+        return match.start() + 1 if match else content_len
+
+    if pending:
+        first_entry = 0 if _ENTRY_AT_START_RE.match(log_content) else next_entry_start(0)
+        # An error header closes the open block itself and is picked up as a span below
+        if _ERROR_ENTRY_AT_START_RE.match(log_content, first_entry):
+            yield _split_block(log_content, 0, first_entry)
+        else:
+            yield _split_block(log_content, 0, line_end(first_entry))
+
+    error_starts = _error_entry_starts(log_content)
+
+    # Adjacent error entries are coalesced into one span and split in a single call
+    span_start = span_end = 0
+    for start in error_starts:
+        if start != span_end and span_end > span_start:
+            yield _split_block(log_content, span_start, line_end(span_end))
+            span_start = start
+        elif span_end == span_start:
+            span_start = start
+        # The entry runs from its header until the next entry of any kind
+        header_end = log_content.find('\n', start)
+        span_end = next_entry_start(header_end) if header_end != -1 else content_len
+    if span_end > span_start:
+        yield _split_block(log_content, span_start, line_end(span_end))
+
+def _error_entry_starts(log_content):
+    """
+    Return the offsets of entry headers that mention ERROR.
+    str.find jumps between "ERROR" occurrences far faster than a regex can test
+    every line start, and only lines that contain the word are checked as headers.
+    """
+    find = log_content.find
+    rfind = log_content.rfind
+    is_error_header = _ERROR_ENTRY_AT_START_RE.match
+    starts = []
+    pos = find("ERROR")
+    while pos != -1:
+        line_start = rfind("\n", 0, pos) + 1
+        if is_error_header(log_content, line_start):
+            starts.append(line_start)
+        # Later occurrences on the same line cannot add another header
+        line_end = find("\n", pos)
+        if line_end == -1:
+            break
+        pos = find("ERROR", line_end)
+    return starts
+
+def _error_block_lines(log_content, pending=False):
+    """Iterate the lines of _error_blocks(); chain flattens the blocks without a per-line Python frame."""
+    return chain.from_iterable(_error_blocks(log_content, pending))
+
+def _split_block(log_content, start, end):
+    """Split log_content[start:end] into lines, dropping the newline that ends the span."""
+    if end <= start:
+        return ()
+    if log_content[end - 1] == '\n':
+        end -= 1
+    return log_content[start:end].split('\n')
+
+def _decode_log_bytes(data):
+    """
+    Decode raw log bytes the way a text-mode file would (UTF-8, universal newlines),
+    with ANSI codes stripped from the whole buffer in one pass.
+    """
+    text = data.decode("utf-8", errors="ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "\x1b" in text:
+        text = _ANSI_RE.sub('', text)
+    return text
+
+def _parse_log_lines(line_iter, strip_ansi=True, limit=None):
+    """Parse an iterable of log lines and return error clusters."""
+    counts, traces = _collect_log_clusters(line_iter, strip_ansi)
+    return _build_clusters(counts, traces, limit)
+
+def _build_clusters(counts, traces, limit=None):
+    """
+    Convert cluster counts and traces to a list of dicts, sorted by count desc.
+    With limit set only the top clusters are built; most_common(n) selects them
+    with heapq.nlargest instead of sorting every cluster.
+    """
+    return [
+        {"message": traces[key][0], "count": count, "trace": traces[key][1]}
+        for key, count in counts.most_common(limit)
+    ]
 
-    pending_error_msg = None
-    pending_trace = []
-    stack_confirmed = False
+def _normalize_msg(msg):
+    """
+    Replace variable tokens (UUIDs, hex ids, quoted values, numbers) with placeholders.
 
-    # Regex for standard new entry (with optional prefix)
-    # Matches: [Optional Prefix] [Date YYYY-MM-DD or YYYY/MM/DD]
-    # Prefix: digits followed by - or :
-    regex_entry = re.compile(r'^(?:(\d+[-:])\s*)?(\d{4}[-/]\d{2}[-/]\d{2})')
-    # Regex to strip prefix from continuation lines
-    regex_prefix_continuation = re.compile(r'^\d+[-:]')
+    >>> _normalize_msg("User 'bob' not found after 3 tries")
+    'User <str> not found after <num> tries'
+    >>> _normalize_msg("Can't open file, won't retry")
+    "Can't open file, won't retry"
+    """
+    return _NORMALIZE_RE.sub(lambda m: f"<{m.lastgroup}>", msg)
+
+def _collect_log_clusters(line_iter, strip_ansi=True, resume=None, snapshot=False):
+    """
+    Scan an iterable of log lines and return (counts, traces) keyed by cluster.
+    Clusters are keyed on the normalized message plus first stack line; traces
+    maps each key to (first-seen message, first-seen trace) for display.
+    Lines may keep their trailing newline; it is stripped once per line here,
+    so an open file handle can be passed directly without loading it into memory.
+    Pass strip_ansi=False when the input is known to contain no escape codes.
+
+    `resume` continues from a parser state saved by an earlier call. With
+    snapshot=True the state before the final block is flushed is returned as a
+    third element, so parsing can later resume after new lines are appended.
+    State is (counts, traces, pending_error_msg, pending_trace, stack_confirmed).
+    """
+    if resume is None:
+        counts = Counter() # Map key -> occurrence count
+        traces = {} # Map key -> first-seen trace
+        pending_error_msg = None
+        pending_trace = []
+        stack_confirmed = False
+    else:
+        counts, traces, pending_error_msg, pending_trace, stack_confirmed = resume
+
+    # Bind the per-line regex methods to locals once; the loop below runs for every line
+    ansi_sub = _ANSI_RE.sub
+    entry_match = _ENTRY_RE.match
+    prefix_match_re = _PREFIX_CONT_RE.match
+    stack_match = _STACK_RE.match
+    v1_match_re = _V1_RE.match
+
+    # (message, first stack line) -> (key, display); the same blocks repeat throughout a log,
+    # so duplicates skip normalizing and rebuilding the composite strings
+    block_keys = {}
 
     # Helper to finalize block
-    def finalize_block(msg, trace, data_dict):
-        key = msg
-        # Try to append first stack line for better context/clustering
-        if len(trace) > 1:
-            first_trace_line = trace[1].strip()
-            # Truncate if too long to keep UI clean
-            key = f"{msg} \n {first_trace_line[:100]}"
-
-        if key not in data_dict:
-             data_dict[key] = {'count': 1, 'trace': "".join(trace)}
+    def finalize_block(msg, trace):
+        raw_first_line = trace[1] if len(trace) > 1 else None
+        cached = block_keys.get((msg, raw_first_line))
+        if cached is not None:
+            key, display = cached
         else:
-             data_dict[key]['count'] += 1
-
-    lines = log_content.split('\n')
-    for line in lines:
+            norm_msg = _normalize_msg(msg)
+            display = msg
+            key = norm_msg
+            # Try to append first stack line for better context/clustering
+            if raw_first_line is not None:
+                first_trace_line = raw_first_line.strip()
+                # Truncate if too long to keep UI clean
+                display = f"{msg} \n {first_trace_line[:100]}"
+                key = f"{norm_msg} \n {first_trace_line[:100]}"
+            # Interned so equal keys from other parses (tail cache, parallel chunks) share one str
+            key = sys.intern(key)
+            block_keys[(msg, raw_first_line)] = (key, display)
+
+        counts[key] += 1
+        if key not in traces:
+            # Lines are stored without newlines; join once instead of concatenating per line
+            traces[key] = (display, "\n".join(trace) + "\n")
+
+    for line in line_iter:
         # Strip ANSI codes first
-        clean_line = strip_ansi_codes(line)
-        
-        match_entry = regex_entry.match(clean_line)
+        clean_line = line.rstrip('\n')
+        if strip_ansi:
+            clean_line = ansi_sub('', clean_line)
+
+        # Cheap prefilter: v1 headers are the common case, so test them before any regex
         is_new_entry = False
-        
-        if match_entry:
+        if clean_line.startswith("v1|"):
             is_new_entry = True
-            # If prefix present, strip it
-            if match_entry.group(1):
-                clean_line = clean_line[match_entry.start(2):]
-        elif clean_line.startswith("v1|"):
-            is_new_entry = True
-        else:
-            # Try to strip line number prefix (e.g., "28266974-" or "28266974:")
-            prefix_match = regex_prefix_continuation.match(clean_line)
-            if prefix_match:
-                clean_line = clean_line[len(prefix_match.group(0)):]
-                # After stripping prefix, check if it's a v1 entry
-                if clean_line.startswith("v1|"):
-                    is_new_entry = True
-        
-        stripped = clean_line.strip()
-        
+        # Both regexes below need a leading digit; indented stack frames and other
+        # continuation text are ruled out by one character test instead of two failed matches
+        elif clean_line[:1].isdigit():
+            match_entry = entry_match(clean_line)
+            if match_entry:
+                is_new_entry = True
+                # If prefix present, strip it
+                if match_entry.group(1):
+                    clean_line = clean_line[match_entry.start(2):]
+            else:
+                # Try to strip line number prefix (e.g., "28266974-" or "28266974:")
+                prefix_match = prefix_match_re(clean_line)
+                if prefix_match:
+                    clean_line = clean_line[len(prefix_match.group(0)):]
+                    # After stripping prefix, check if it's a v1 entry
+                    if clean_line.startswith("v1|"):
+                        is_new_entry = True
+
         if is_new_entry:
             # End of previous block: Did we have an error with a confirmed stack trace?
             if pending_error_msg and stack_confirmed:
-                finalize_block(pending_error_msg, pending_trace, error_data)
+                finalize_block(pending_error_msg, pending_trace)
 
             # Reset for new block
             pending_error_msg = None
@@ -214,70 +614,412 @@ def parse_log_content(log_content):
 
             # Check if THIS new line is an error
             # 1. v1 format
-            if stripped.startswith("v1|"):
-                parts = stripped.split("|")
-                if len(parts) > 9:
-                    level = parts[6].strip()
-                    if "ERROR" in level:
-                        pending_error_msg = parts[9].strip()
-                        pending_trace.append(clean_line + '\n')
+            if clean_line.startswith("v1|"):
+                # Pull out only the level (field 6) and message (field 9), no list of fields
+                v1_match = v1_match_re(clean_line)
+                if v1_match and "ERROR" in v1_match.group('level'):
+                    pending_error_msg = v1_match.group('msg').strip()
+                    pending_trace.append(clean_line)
             # 2. Python format: "YYYY-MM-DD ... - ERROR - ..."
             else:
-                if " - ERROR - " in stripped:
-                    # Extract message: everything after " - ERROR - "
-                    # Format: DATE - MODULE - ERROR - FILE:LINE - FUNC - MSG
-                    parts = stripped.split(" - ERROR - ", 1)
-                    if len(parts) == 2:
-                        pending_error_msg = parts[1].strip()
-                        pending_trace.append(clean_line + '\n')
-        else:
-            # Continuation line
-            if pending_error_msg:
-                pending_trace.append(clean_line + '\n')
-                
-                # Check for Stack Traces
-                # Java: "at ...", "Caused by: ...", "... ", exception class names
-                # Python: "File "...", line ...", "Traceback (most recent call last):", "During handling of the above exception..."
-                if (stripped.startswith("at ") or
-                    stripped.startswith("Caused by:") or
-                    stripped.startswith("... ") or
-                    stripped.startswith('File "') or
-                    stripped.startswith("Traceback (") or
-                    stripped.startswith("During handling of") or
-                    # Java exception class names (e.g., "java.lang.NullPointerException:")
-                    (("Exception:" in stripped or "Error:" in stripped) and "." in stripped)):
-                    stack_confirmed = True
+                # Extract message: everything after " - ERROR - "
+                # Format: DATE - MODULE - ERROR - FILE:LINE - FUNC - MSG
+                # partition() finds the marker and splits in one scan, without building a list
+                _, marker, py_msg = clean_line.partition(" - ERROR - ")
+                if marker:
+                    pending_error_msg = py_msg.strip()
+                    pending_trace.append(clean_line)
+        elif pending_error_msg:
+            # Continuation line of an error block
+            pending_trace.append(clean_line)
+
+            # Once the block is confirmed, the remaining lines only need collecting
+            if stack_confirmed:
+                continue
+
+            # Check for Stack Traces (the regex skips indentation, so no strip() copy is needed)
+            if (stack_match(clean_line) or
+                # Java exception class names (e.g., "java.lang.NullPointerException:")
+                (("Exception:" in clean_line or "Error:" in clean_line) and "." in clean_line)):
+                stack_confirmed = True
+
+    state = None
+    if snapshot:
+        # The last block may still be growing, so save it unflushed
+        state = (counts.copy(), dict(traces), pending_error_msg, list(pending_trace), stack_confirmed)
 
     # End of content check
     if pending_error_msg and stack_confirmed:
-        finalize_block(pending_error_msg, pending_trace, error_data)
+        finalize_block(pending_error_msg, pending_trace)
+
+    if snapshot:
+        return counts, traces, state
+    return counts, traces
+
+# Log files are scanned for error blocks this many bytes at a time
+SCAN_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Parsed-cluster cache: lets unchanged or appended-to logs skip re-parsing the whole file.
+# Entries are plain JSON (never unpickled), least recently used ones are evicted past
+# the limits below, and logs in the temp dir (one-off uploads) are not cached at all.
+PARSE_CACHE_DIR = os.path.expanduser("~/.cache/codemedic")
+PARSE_CACHE_MAX_ENTRIES = 64
+PARSE_CACHE_MAX_BYTES = int(os.environ.get("CODEMEDIC_PARSE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+_PARSE_CACHE_VERSION = 4
+_PARSE_CACHE_HEAD_BYTES = 4096
+_PARSE_CACHE_SKIP_DIRS = tuple({os.path.realpath("/tmp"), os.path.realpath(tempfile.gettempdir())})
+
 
-    # Convert to list of dicts
-    unique_errors = []
-    for msg, data in error_data.items():
-        unique_errors.append({"message": msg, "count": data['count'], "trace": data['trace']})
+def _parse_cache_path(log_path):
+    digest = hashlib.sha1(os.path.abspath(log_path).encode()).hexdigest()
+    return os.path.join(PARSE_CACHE_DIR, f"{digest}.json")
+
+
+def _is_cacheable_log(log_path):
+    real = os.path.realpath(log_path)
+    return not any(os.path.commonpath([real, root]) == root for root in _PARSE_CACHE_SKIP_DIRS)
+
+
+def drop_parse_cache(log_path):
+    """Delete the cached parse of a log file, e.g. once the file itself is deleted."""
+    try:
+        os.remove(_parse_cache_path(log_path))
+    except OSError:
+        pass
 
-    # Sort by count desc
-    unique_errors.sort(key=lambda x: x["count"], reverse=True)
-    return unique_errors
 
-def parse_log_clusters(log_path):
-    """Parse log file and return clusters."""
+def _load_parse_cache(log_path, st):
+    """
+    Return the cached parse for a log file if the file has only grown since it was cached.
+    The cache is dropped when the file was rotated (new inode), truncated (smaller),
+    or rewritten (the leading bytes no longer match).
+    """
+    if not _is_cacheable_log(log_path):
+        return None
+    try:
+        cache_path = _parse_cache_path(log_path)
+        with open(cache_path, "rb") as f:
+            # Only trust entries this user wrote and nobody else can have changed
+            cache_st = os.fstat(f.fileno())
+            if cache_st.st_uid != os.getuid() or cache_st.st_mode & 0o022:
+                logger.warning(f"Ignoring parse cache {cache_path}: not owned by this user or writable by others")
+                return None
+            cache = json.load(f)
+        if (cache.get("version") != _PARSE_CACHE_VERSION or
+                cache["inode"] != st.st_ino or st.st_size < cache["offset"]):
+            return None
+        with open(log_path, "rb") as f:
+            head = f.read(cache["head_len"])
+        if hashlib.blake2b(head, digest_size=16).hexdigest() != cache["head_hash"]:
+            return None
+        counts, traces, pending_error_msg, pending_trace, stack_confirmed = cache["state"]
+        cache["state"] = (
+            Counter(counts),
+            {key: tuple(trace) for key, trace in traces.items()},
+            pending_error_msg, pending_trace, stack_confirmed,
+        )
+        # Recently used entries are the last to be evicted
+        os.utime(cache_path)
+        return cache
+    except Exception as e:
+        logger.debug(f"No usable parse cache for {log_path}: {e}")
+        return None
+
+
+def _trim_parse_cache():
+    """Evict the least recently used cache entries until the directory is within its limits."""
+    with os.scandir(PARSE_CACHE_DIR) as it:
+        entries = []
+        for entry in it:
+            if entry.name.endswith(".pkl"):
+                # Left by versions that pickled the cache; never read any more
+                os.remove(entry.path)
+            elif entry.name.endswith(".json"):
+                st = entry.stat()
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    while entries and (len(entries) > PARSE_CACHE_MAX_ENTRIES or total > PARSE_CACHE_MAX_BYTES):
+        _, size, path = entries.pop(0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def _save_parse_cache(log_path, offset, state):
+    """Persist the parser state for the first `offset` bytes of a log file (best effort)."""
+    if not _is_cacheable_log(log_path):
+        return
+    try:
+        with open(log_path, "rb") as f:
+            # Only resume on a line boundary; a partially written last line would be split
+            if offset == 0 or os.pread(f.fileno(), 1, offset - 1) != b"\n":
+                return
+            st = os.fstat(f.fileno())
+            head = f.read(min(offset, _PARSE_CACHE_HEAD_BYTES))
+        counts, traces, pending_error_msg, pending_trace, stack_confirmed = state
+        cache = {
+            "version": _PARSE_CACHE_VERSION,
+            "inode": st.st_ino,
+            "offset": offset,
+            "mtime_ns": st.st_mtime_ns,
+            "head_len": len(head),
+            "head_hash": hashlib.blake2b(head, digest_size=16).hexdigest(),
+            "state": [counts, traces, pending_error_msg, pending_trace, stack_confirmed],
+        }
+        os.makedirs(PARSE_CACHE_DIR, mode=0o700, exist_ok=True)
+        cache_path = _parse_cache_path(log_path)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        # Private to this user from the moment it exists
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+        _trim_parse_cache()
+    except Exception as e:
+        logger.debug(f"Could not write parse cache for {log_path}: {e}")
+
+
+@_singleflight
+def parse_log_clusters(log_path, tail_bytes=None, tail_errors=None, limit=None):
+    """
+    Parse log file and return clusters.
+    Results are cached on disk; if the log has only been appended to since the
+    last parse, just the new bytes are parsed and merged into the cached state.
+
+    With tail_bytes set, only the end of the file is parsed (see _parse_log_tail),
+    stopping early once tail_errors distinct clusters have been found.
+    With limit set, only the limit most frequent clusters are returned.
+    Raises FileNotFoundError if the log file doesn't exist.
+    """
     print(f"Parsing log file: {log_path}")
 
+    if tail_bytes:
+        return _parse_log_tail(log_path, tail_bytes, tail_errors, limit)
+
+    st = os.stat(log_path)
+    cache = _load_parse_cache(log_path, st)
+    offset = cache["offset"] if cache else 0
+    resume = cache["state"] if cache else None
+    if cache:
+        logger.info(f"Resuming cached parse of {log_path} at byte {offset}")
+
+    # Stream the file so large logs are never held in memory at once
+    with open(log_path, "rb", buffering=1 << 20) as raw:
+        raw.seek(offset)
+        # A resumed parse may start inside the block that was open when it was cached
+        lines = _error_block_file_lines(raw, pending=resume is not None)
+        counts, traces, state = _collect_log_clusters(lines, strip_ansi=False, resume=resume, snapshot=True)
+        end_offset = raw.tell()
+
+    _save_parse_cache(log_path, end_offset, state)
+    return _build_clusters(counts, traces, limit)
+
+def _error_block_file_lines(raw, pending=False, size=None):
+    """Iterate the error-block lines of a binary file; see _error_file_blocks."""
+    return chain.from_iterable(_error_file_blocks(raw, pending, size))
+
+def _error_file_blocks(raw, pending=False, size=None):
+    """
+    Feed a binary file to _error_blocks in SCAN_CHUNK_BYTES pieces cut at line ends,
+    stopping after size bytes if given. A cut may fall inside an error block, so
+    every piece after the first is scanned with pending=True to carry the open block across.
+    """
+    leftover = b""
+    remaining = size
+    while True:
+        if remaining is None:
+            data = raw.read(SCAN_CHUNK_BYTES)
+        else:
+            data = raw.read(min(SCAN_CHUNK_BYTES, remaining))
+            remaining -= len(data)
+        if not data:
+            if leftover:
+                yield from _error_blocks(_decode_log_bytes(leftover), pending)
+            return
+        buf = leftover + data
+        cut = buf.rfind(b"\n") + 1
+        if cut == 0:
+            leftover = buf  # No complete line yet
+            continue
+        yield from _error_blocks(_decode_log_bytes(buf[:cut]), pending)
+        leftover = buf[cut:]
+        pending = True
+
+# Logs smaller than this are parsed sequentially; process startup would outweigh the gain
+PARALLEL_PARSE_MIN_BYTES = 10 * 1024 * 1024
+
+# Start of a new log entry: a v1 header or a dated line, with optional grep-style "123-" prefix
+_BLOCK_START_RE = re.compile(rb'\n(?=(?:\d+[-:]\s*)?(?:v1\||\d{4}[-/]\d{2}[-/]\d{2}))')
+
+
+def _block_aligned_ranges(log_path, workers):
+    """Split a log file into up to `workers` byte ranges that each start on an entry boundary."""
+    size = os.path.getsize(log_path)
+    step = max(1, size // workers)
+    offsets = [0]
+    with open(log_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for guess in range(step, size, step):
+            if guess <= offsets[-1]:
+                continue
+            match = _BLOCK_START_RE.search(mm, guess)
+            if not match:
+                break
+            offsets.append(match.start() + 1)
+    offsets.append(size)
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+
+def _collect_log_range(log_path, start, end, snapshot=False):
+    """Worker: parse one byte range of a log file and return (counts, traces)."""
+    with open(log_path, "rb") as f:
+        f.seek(start)
+        # Streamed in chunks, so a worker never holds its whole range in memory
+        lines = _error_block_file_lines(f, size=end - start)
+        return _collect_log_clusters(lines, strip_ansi=False, snapshot=snapshot)
+
+
+def _merge_clusters(counts, traces, chunk_counts, chunk_traces):
+    """Merge one chunk's results into the running totals (earlier chunks keep their trace)."""
+    counts.update(chunk_counts)
+    for key, trace in chunk_traces.items():
+        traces.setdefault(key, trace)
+
+
+def parse_log_clusters_parallel(log_path, workers=None, limit=None):
+    """
+    Parse a large log file across worker processes and return clusters.
+    The file is split on entry boundaries so no block straddles two chunks,
+    and per-chunk results are merged in file order (first-seen trace wins).
+    Small files fall back to the sequential parse_log_clusters().
+    """
+    workers = workers or os.cpu_count() or 1
     try:
-        with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
-            log_content = f.read()
-            return parse_log_content(log_content)
-    except FileNotFoundError:
-        print(f"Error: Log file not found at {log_path}")
-        sys.exit(1)
+        st = os.stat(log_path)
+    except OSError:
+        return parse_log_clusters(log_path, limit=limit)
+    # A cached parse only needs the appended bytes, which the sequential path handles
+    if workers < 2 or st.st_size < PARALLEL_PARSE_MIN_BYTES or _load_parse_cache(log_path, st):
+        return parse_log_clusters(log_path, limit=limit)
+
+    print(f"Parsing log file with {workers} workers: {log_path}")
+    ranges = _block_aligned_ranges(log_path, workers)
+
+    counts = Counter()
+    traces = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        futures = [executor.submit(_collect_log_range, log_path, start, end) for start, end in ranges[:-1]]
+        # The last chunk also returns its unflushed state so the result can be cached
+        last_future = executor.submit(_collect_log_range, log_path, *ranges[-1], snapshot=True)
+        for future in futures:
+            _merge_clusters(counts, traces, *future.result())
+        last_counts, last_traces, last_state = last_future.result()
+
+    state_counts, state_traces, *pending = last_state
+    cached_counts, cached_traces = counts.copy(), dict(traces)
+    _merge_clusters(cached_counts, cached_traces, state_counts, state_traces)
+    _save_parse_cache(log_path, ranges[-1][1], (cached_counts, cached_traces, *pending))
+
+    _merge_clusters(counts, traces, last_counts, last_traces)
+    return _build_clusters(counts, traces, limit)
+
+TAIL_BLOCK_BYTES = 64 * 1024
+
+
+def _parse_log_tail(log_path, tail_bytes, tail_errors=None, limit=None):
+    """
+    Parse only the most recent part of a log file.
+    Reads backwards from EOF in TAIL_BLOCK_BYTES steps, snapping each step to an
+    entry boundary, until tail_bytes have been scanned, tail_errors distinct
+    clusters were found, or the start of the file is reached. Segments are then
+    merged in file order, so counts and traces match a forward parse of the window.
+    """
+    segments = []
+    seen = set()
+    with open(log_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            seg_end = size
+            window_start = size
+            while seg_end > 0 and size - window_start < tail_bytes:
+                window_start = max(0, window_start - TAIL_BLOCK_BYTES)
+                if window_start == 0:
+                    seg_start = 0
+                else:
+                    match = _BLOCK_START_RE.search(mm, window_start, seg_end)
+                    if not match:
+                        continue  # No entry boundary yet, keep widening the window
+                    seg_start = match.start() + 1
+
+                lines = _error_block_lines(_decode_log_bytes(mm[seg_start:seg_end]))
+                seg_counts, seg_traces = _collect_log_clusters(lines, strip_ansi=False)
+                segments.append((seg_counts, seg_traces))
+                seen.update(seg_counts)
+                seg_end = seg_start
+                window_start = seg_start
+
+                if tail_errors and len(seen) >= tail_errors:
+                    break
+
+    counts = Counter()
+    traces = {}
+    for seg_counts, seg_traces in reversed(segments):
+        _merge_clusters(counts, traces, seg_counts, seg_traces)
+    return _build_clusters(counts, traces, limit)
+
+# Resolved opencode binary and the environment from ~/.zshrc, cached once opencode is found
+_OPENCODE_BIN: str | None = None
+_OPENCODE_ENV: dict[str, str] | None = None
+_opencode_resolve_lock = threading.Lock()
+
+
+def _resolve_opencode():
+    """
+    Resolve the opencode binary and the shell environment it needs, once per process.
+    Sources ~/.zshrc a single time and captures the resulting environment, so later
+    calls can exec opencode directly instead of spawning a shell for every command.
+    Returns (binary_path, env); binary_path is None if opencode cannot be found.
+    A miss isn't cached, so opencode installed while the server runs is picked up.
+    """
+    global _OPENCODE_BIN, _OPENCODE_ENV
+    with _opencode_resolve_lock:
+        if _OPENCODE_BIN is not None:
+            return _OPENCODE_BIN, _OPENCODE_ENV
 
+        env = dict(os.environ)
+        try:
+            result = subprocess.run(
+                ["/bin/zsh", "-c", "source ~/.zshrc >/dev/null 2>&1; env -0"],
+                capture_output=True, text=True, timeout=30
+            )
+            if result.returncode == 0:
+                for entry in result.stdout.split('\0'):
+                    key, sep, value = entry.partition('=')
+                    if sep:
+                        env[key] = value
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"Could not load shell environment from ~/.zshrc: {e}")
+
+        opencode_bin = shutil.which("opencode", path=env.get("PATH"))
+        if opencode_bin is None:
+            logger.warning("opencode not found on the PATH from ~/.zshrc")
+            return None, env
+        _OPENCODE_BIN, _OPENCODE_ENV = opencode_bin, env
+        logger.info(f"Resolved opencode binary: {_OPENCODE_BIN}")
+        return _OPENCODE_BIN, _OPENCODE_ENV
+
+
+@_singleflight
 def get_available_models():
     """Fetches available models from opencode."""
     try:
-        cmd = 'source ~/.zshrc && opencode models'
-        result = subprocess.run(cmd, shell=True, executable="/bin/zsh", capture_output=True, text=True)
+        opencode_bin, opencode_env = _resolve_opencode()
+        if not opencode_bin:
+            return []
+        result = subprocess.run([opencode_bin, "models"], env=opencode_env, capture_output=True, text=True)
         if result.returncode == 0:
             # Filter distinct non-empty lines, ignore version numbers if any
             models = [line.strip() for line in result.stdout.split('\n') if line.strip() and not line.strip()[0].isdigit()]
@@ -287,53 +1029,233 @@ def get_available_models():
         return []
 
 # Process tracker for cancellation support - keyed by job_id for multi-user concurrency
-_opencode_processes: dict[str, subprocess.Popen] = {}
-_opencode_processes_lock = threading.Lock()
+# Single dict operations (set, pop) are atomic, so no lock is shared across jobs
+_opencode_processes: dict[str, "subprocess.Popen | _AsyncProcessHandle"] = {}
 
 
 def cancel_opencode_fix(job_id: str):
     """Cancel the running OpenCode process for a specific job."""
-    with _opencode_processes_lock:
-        process = _opencode_processes.get(job_id)
-        if process and process.poll() is None:
-            process.terminate()
-            try:
-                process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                process.kill()
-            _opencode_processes.pop(job_id, None)
-            return True, f"OpenCode process {job_id} cancelled."
-        return False, f"No running process found for job {job_id}."
+    # Take the process out first so the up-to-5s wait below blocks nobody else
+    process = _opencode_processes.pop(job_id, None)
+    if process and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        return True, f"OpenCode process {job_id} cancelled."
+    return False, f"No running process found for job {job_id}."
 
 
 def _register_process(job_id: str, process: subprocess.Popen):
     """Register a process for a job."""
-    with _opencode_processes_lock:
-        _opencode_processes[job_id] = process
+    _opencode_processes[job_id] = process
 
 
 def _unregister_process(job_id: str):
     """Unregister a process for a job."""
-    with _opencode_processes_lock:
-        _opencode_processes.pop(job_id, None)
+    _opencode_processes.pop(job_id, None)
+
+
+def _iter_output_lines(stream):
+    """
+    Yield decoded lines from a binary pipe as soon as each one is complete.
+    read1() returns whatever is already buffered (up to 64 KiB) with a single read,
+    and each line is decoded once, without the per-read overhead of a text wrapper.
+    Like text mode, \r, \n and \r\n all end a line.
+    """
+    partial = b""
+    while chunk := stream.read1(65536):
+        lines = (partial + chunk).splitlines()
+        # The last piece may be an incomplete line; keep it for the next read
+        partial = b"" if chunk.endswith((b"\n", b"\r")) else lines.pop()
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if partial:
+        yield partial.decode("utf-8", errors="replace")
+
+
+class _OpenCodeRun(NamedTuple):
+    """Request from _opencode_fix_steps to run opencode and send back (return_code, output_lines)."""
+    cmd: list[str]
+    cwd: str
+    env: dict[str, str] | None
+
+
+def _advance_steps(steps, value=None, error=None):
+    """
+    Resume a fix-steps generator with a value or an exception.
+    Returns (done, item), so StopIteration never has to cross a thread boundary.
+    """
+    try:
+        if error is not None:
+            return False, steps.throw(error)
+        return False, steps.send(value)
+    except StopIteration:
+        return True, None
 
 
-def run_opencode_fix(repo_path, error_context, job_id: str, model=None):
+def run_opencode_fix(repo_path, error_context, job_id: str, model=None, push=True, checkout=True):
     """
     Runs opencode fix using Git Worktrees for concurrency.
     1. Creates temporary worktree + branch.
     2. Runs fix in worktree.
+    3. Commits & Pushes from worktree (push=False leaves the push to the caller).
+    4. Applies changes to Main Repo (Checkout + Soft Reset) for user review
+       (checkout=False or push=False leaves the main checkout alone; the fix stays on its branch).
+    """
+    steps = _opencode_fix_steps(repo_path, error_context, model, push, checkout)
+    try:
+        done, item = _advance_steps(steps)
+        while not done:
+            if isinstance(item, _OpenCodeRun):
+                try:
+                    result = yield from _stream_opencode(item, job_id)
+                except Exception as e:
+                    done, item = _advance_steps(steps, error=e)
+                else:
+                    done, item = _advance_steps(steps, result)
+            else:
+                yield item
+                done, item = _advance_steps(steps)
+    finally:
+        # Cleanup process registration; closing the steps removes the worktree
+        _unregister_process(job_id)
+        steps.close()
+
+
+def _stream_opencode(run: _OpenCodeRun, job_id: str):
+    """Run opencode, yielding its non-empty output lines; returns (return_code, output_lines)."""
+    process = subprocess.Popen(
+        run.cmd,
+        cwd=run.cwd,
+        env=run.env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        # Binary pipe, split and decoded in _iter_output_lines rather than by the text layer
+        bufsize=65536
+    )
+    # Register process with job_id for per-user cancellation support
+    _register_process(job_id, process)
+
+    # Stream output
+    full_output = []
+    for line in _iter_output_lines(process.stdout):
+        line_clean = line.strip()
+        if line_clean:
+            full_output.append(line_clean)
+            yield line_clean
+    return process.wait(), full_output
+
+
+class _AsyncProcessHandle:
+    """
+    Popen-like view of an asyncio subprocess, so cancel_opencode_fix can stop it from
+    a worker thread. Must not be waited on from the event loop's own thread.
+    """
+
+    def __init__(self, process: asyncio.subprocess.Process, loop: asyncio.AbstractEventLoop):
+        self._process = process
+        self._loop = loop
+
+    def poll(self):
+        return self._process.returncode
+
+    def _signal(self, method):
+        def send():
+            if self._process.returncode is None:
+                method()
+        self._loop.call_soon_threadsafe(send)
+
+    def terminate(self):
+        self._signal(self._process.terminate)
+
+    def kill(self):
+        self._signal(self._process.kill)
+
+    def wait(self, timeout=None):
+        future = asyncio.run_coroutine_threadsafe(self._process.wait(), self._loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            raise subprocess.TimeoutExpired("opencode", timeout)
+
+
+async def _aiter_output_lines(stream: asyncio.StreamReader):
+    """Async counterpart of _iter_output_lines for an asyncio subprocess pipe."""
+    partial = b""
+    while chunk := await stream.read(65536):
+        lines = (partial + chunk).splitlines()
+        # The last piece may be an incomplete line; keep it for the next read
+        partial = b"" if chunk.endswith((b"\n", b"\r")) else lines.pop()
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if partial:
+        yield partial.decode("utf-8", errors="replace")
+
+
+async def run_opencode_fix_async(repo_path, error_context, job_id: str, model=None):
+    """
+    Async version of run_opencode_fix for the API server.
+    opencode is streamed through asyncio subprocess pipes, so no thread is held while
+    waiting for its output; the git steps in between run in worker threads.
+    """
+    steps = _opencode_fix_steps(repo_path, error_context, model)
+    process = None
+    try:
+        done, item = await asyncio.to_thread(_advance_steps, steps)
+        while not done:
+            if isinstance(item, _OpenCodeRun):
+                try:
+                    process = await asyncio.create_subprocess_exec(
+                        *item.cmd,
+                        cwd=item.cwd,
+                        env=item.env,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.STDOUT
+                    )
+                    # Register process with job_id for per-user cancellation support
+                    _register_process(job_id, _AsyncProcessHandle(process, asyncio.get_running_loop()))
+
+                    full_output = []
+                    async for line in _aiter_output_lines(process.stdout):
+                        line_clean = line.strip()
+                        if line_clean:
+                            full_output.append(line_clean)
+                            yield line_clean
+                    result = (await process.wait(), full_output)
+                except Exception as e:
+                    done, item = await asyncio.to_thread(_advance_steps, steps, error=e)
+                else:
+                    done, item = await asyncio.to_thread(_advance_steps, steps, result)
+            else:
+                yield item
+                done, item = await asyncio.to_thread(_advance_steps, steps)
+    finally:
+        _unregister_process(job_id)
+        # The client may have disconnected mid-run; don't leave opencode running
+        if process is not None and process.returncode is None:
+            process.kill()
+        await asyncio.to_thread(steps.close)
+
+
+def _opencode_fix_steps(repo_path, error_context, model=None, push=True, checkout=True):
+    """
+    The steps of an opencode fix, shared by run_opencode_fix and run_opencode_fix_async.
+    Yields progress strings and a final result tuple like run_opencode_fix; to run opencode
+    it yields an _OpenCodeRun and expects (return_code, output_lines) to be sent back,
+    so each caller can stream the process its own way.
+
+    Uses Git Worktrees for concurrency.
+    1. Creates temporary worktree + branch.
+    2. Runs fix in worktree.
     3. Commits & Pushes from worktree.
     4. Applies changes to Main Repo (Checkout + Soft Reset) for user review.
     """
-    import time
-    
     logger.info(f"🔧 Delegating fix to OpenCode for repo: {repo_path}")
     logger.debug(f"Model: {model}")
     
     # 1. Setup Worktree
-    import time
-    import random
     # Use random suffix to avoid collision if two requests arrive in same second
     ts = int(time.time())
     rand_suffix = random.randint(1000, 9999)
@@ -351,41 +1273,19 @@ def run_opencode_fix(repo_path, error_context, job_id: str, model=None):
             "Locate the code responsible for this error and apply a fix directly to the file(s). "
             "Do not ask for confirmation, just apply the code changes."
         )
-        safe_prompt = shlex.quote(prompt)
 
-        # Construct command - run in WORKTREE
-        base_cmd = 'source ~/.zshrc && opencode run --print-logs'
-        if model:
-            base_cmd += f' --model {shlex.quote(model)}'
-        else:
-            base_cmd += ' --model zai-coding-plan/glm-4.7'
-        cmd = f'{base_cmd} {safe_prompt}'
+        opencode_bin, opencode_env = _resolve_opencode()
+        if not opencode_bin:
+            yield (False, "OpenCode CLI not found. Ensure it is installed and on the PATH set by ~/.zshrc.")
+            return
 
-        logger.info(f"📝 Executing OpenCode command in worktree: {worktree_path}")
+        # Construct command - exec opencode directly (no shell), run in WORKTREE
+        cmd = [opencode_bin, "run", "--print-logs", "--model", model or "zai-coding-plan/glm-4.7", prompt]
 
-        full_output = []
-        process = subprocess.Popen(
-            cmd,
-            shell=True,
-            cwd=worktree_path, # IMPORTANT: Run in worktree
-            executable="/bin/zsh",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
-        )
-        # Register process with job_id for per-user cancellation support
-        _register_process(job_id, process)
-
-        # Stream output
-        for line in process.stdout:
-            line_clean = line.strip()
-            if line_clean:
-                full_output.append(line_clean)
-                yield line_clean
+        logger.info(f"📝 Executing OpenCode command in worktree: {worktree_path}")
 
-        return_code = process.wait()
+        # IMPORTANT: Run in worktree
+        return_code, full_output = yield _OpenCodeRun(cmd, worktree_path, opencode_env)
         combined_output = "\n".join(full_output)
 
         if return_code != 0:
@@ -402,34 +1302,38 @@ def run_opencode_fix(repo_path, error_context, job_id: str, model=None):
 
         # 2. Commit & Push in Worktree
         # Check if changes exist
-        diff_res = subprocess.run(["git", "diff", "--name-only"], cwd=worktree_path, capture_output=True, text=True)
+        diff_res = _run_git(["diff", "--name-only"], worktree_path)
         if not diff_res.stdout.strip():
              yield (False, "OpenCode succeeded but no files were changed.")
              return
 
-        subprocess.run(["git", "add", "."], cwd=worktree_path, check=True)
+        subprocess.run(["git", "add", "."], cwd=worktree_path, check=True, capture_output=True, text=True)
 
         # Unstage IDE files before commit
         unstage_ide_files(worktree_path)
 
-        # Check if we still have changes to commit after unstaging IDE files
-        diff_check = subprocess.run(["git", "diff", "--cached", "--quiet"], cwd=worktree_path)
-        if diff_check.returncode == 0:
-            yield (False, "OpenCode succeeded but only IDE files were changed (excluded from commit).")
-            return
-
         commit_env = os.environ.copy()
         commit_env["GIT_COMMITTER_NAME"] = "CodeMedic Bot"
         commit_env["GIT_COMMITTER_EMAIL"] = "codemedic@automated.local"
-        subprocess.run([
+        commit_cmd = [
             "git", "commit",
             "-m", "AI Fix (Worktree)",
             "--author", "CodeMedic Bot <codemedic@automated.local>"
-        ], cwd=worktree_path, check=True, env=commit_env)
+        ]
+        commit_res = subprocess.run(commit_cmd, cwd=worktree_path, env=commit_env, capture_output=True, text=True)
+        if commit_res.returncode != 0:
+            # Only inspect the index on failure: an empty index means only IDE files had changed
+            diff_check = subprocess.run(["git", "diff", "--cached", "--quiet"], cwd=worktree_path, capture_output=True, text=True)
+            if diff_check.returncode == 0:
+                yield (False, "OpenCode succeeded but only IDE files were changed (excluded from commit).")
+                return
+            raise subprocess.CalledProcessError(commit_res.returncode, commit_cmd, commit_res.stdout, commit_res.stderr)
 
         # Each user pushes to their own unique branch - Git handles remote ref locking
         # No repo_lock needed here, allows concurrent pushes from different worktrees
-        subprocess.run(["git", "push", "-u", "origin", branch_name], cwd=worktree_path, check=True)
+        # With push=False the caller pushes later, e.g. several branches in one push_branches call
+        if push:
+            subprocess.run(["git", "push", "-u", "origin", branch_name], cwd=worktree_path, check=True, capture_output=True, text=True)
 
         # IMPORTANT: Cleanup worktree BEFORE applying to main repo
         # Git doesn't allow checking out a branch that's already checked out in a worktree
@@ -438,43 +1342,50 @@ def run_opencode_fix(repo_path, error_context, job_id: str, model=None):
         cleanup_worktree(repo_path, worktree_path)
         worktree_path = None  # Mark as cleaned so finally block doesn't try again
 
+        if not (push and checkout):
+            # Several fixes at once would each check out their own branch over the others;
+            # an unpushed fix is left on its branch too, for the caller to push and review
+            yield (True, f"Fix committed to {branch_name}", branch_name)
+            return
+
         # 3. Apply to Main Repo (Critical Section)
         # NOTE: The branch already exists on remote with the commit from worktree.
         # We just need to checkout the branch so the user can review and create PR.
         # DO NOT soft reset - it would destroy the branch reference and cause push issues.
         yield "Applying changes to main workspace..."
+        # The worktree shares this repo's object store and refs, and `push -u` already
+        # updated origin/<branch> and its upstream config, so no fetch is needed here
         with repo_lock(repo_path):
-             # Fetch the new branch
-             subprocess.run(["git", "fetch", "origin", branch_name], cwd=repo_path, check=True)
-
-             # Check for uncommitted changes and stash if needed before checkout
-             status_res = subprocess.run(["git", "status", "--porcelain"], cwd=repo_path, capture_output=True, text=True)
-             if status_res.stdout.strip():
-                 logger.warning("Unstaged changes detected in main repo. Stashing...")
-                 subprocess.run(["git", "stash", "save", "-u", f"Auto-stashed before applying {branch_name}"], cwd=repo_path, capture_output=True)
-
-             # Checkout the branch (force create/update from FETCH_HEAD)
-             # We just fetched origin <branch>, so FETCH_HEAD is the tip
-             subprocess.run(["git", "checkout", "-B", branch_name, "FETCH_HEAD"], cwd=repo_path, check=True)
-
-             # Set upstream tracking for this branch
-             subprocess.run(["git", "branch", "--set-upstream-to", f"origin/{branch_name}"], cwd=repo_path, check=False, capture_output=True)
+             # Stash uncommitted changes before checkout; a clean tree is a no-op, so
+             # this replaces the separate `git status` check
+             stash_res = subprocess.run(["git", "stash", "push", "-u", "-m", f"Auto-stashed before applying {branch_name}"], cwd=repo_path, capture_output=True, text=True)
+             if stash_res.returncode == 0 and "No local changes" not in stash_res.stdout:
+                 logger.warning("Unstaged changes detected in main repo. Stashed them.")
+
+             # Checkout the branch at the pushed commit; starting from origin/<branch> also sets upstream tracking
+             checkout_res = subprocess.run(["git", "checkout", "-B", branch_name, f"origin/{branch_name}"], cwd=repo_path, capture_output=True, text=True)
+             if checkout_res.returncode != 0:
+                 # No remote-tracking ref (e.g. a custom fetch refspec): fetch the branch explicitly
+                 subprocess.run(["git", "fetch", "origin", branch_name], cwd=repo_path, check=True, capture_output=True, text=True)
+                 subprocess.run(["git", "checkout", "-B", branch_name, "FETCH_HEAD"], cwd=repo_path, check=True, capture_output=True, text=True)
+                 subprocess.run(["git", "branch", "--set-upstream-to", f"origin/{branch_name}"], cwd=repo_path, check=False, capture_output=True)
 
         # Return branch_name so frontend can use it for PR creation even if repo state changes
         yield (True, f"Fix applied! Changes are ready for review in {branch_name}", branch_name)
 
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Error in worktree fix: {e.stderr or e}")
+        yield (False, f"Error: {e.stderr or e}")
     except Exception as e:
         logger.error(f"Error in worktree fix: {e}", exc_info=True)
         yield (False, f"Error: {e}")
     finally:
-        # 4. Cleanup process registration and worktree
-        _unregister_process(job_id)
+        # 4. Cleanup worktree
         if worktree_path:
             cleanup_worktree(repo_path, worktree_path)
 
 def create_worktree(repo_path, branch_name):
     """Create a temporary worktree for a new branch."""
-    import tempfile
     
     # Create a temp dir outside the repo
     # using mkdtemp ensures unique path
@@ -512,49 +1423,95 @@ def cleanup_worktree(repo_path, worktree_path):
     # 1. git worktree remove
     # Git handles worktree locking internally - no need for repo_lock here
     try:
-        subprocess.run(
-            ["git", "worktree", "remove", "--force", worktree_path],
-            cwd=repo_path,
-            check=False, # Don't crash if already gone
-            capture_output=True
-        )
+        # Don't crash if already gone
+        _run_git(["worktree", "remove", "--force", worktree_path], repo_path)
     except Exception as e:
         logger.warning(f"git worktree remove failed: {e}")
 
     # 2. rm -rf directory if still exists (git remove usually does this, but force to be sure)
     if os.path.exists(worktree_path):
-        import shutil
         try:
              shutil.rmtree(worktree_path)
         except Exception as e:
              logger.warning(f"Failed to remove worktree dir: {e}")
 
+# Where git leaves *.lock files: top-level (index, HEAD, packed-refs, config), refs, and linked worktrees
+_GIT_LOCK_GLOBS = ("*.lock", os.path.join("refs", "**", "*.lock"), os.path.join("worktrees", "*", "*.lock"))
+
+
+def _stale_git_lock_files(repo_path):
+    """
+    Yield git lock files left behind by interrupted git processes.
+    Only the locations git locks are globbed, instead of walking the object store.
+    Our own repo_lock file is skipped: deleting it would let another process lock a new copy.
+    """
+    git_dir = os.path.join(repo_path, ".git")
+    own_lock = os.path.join(git_dir, "codemedic_ops.lock")
+    for pattern in _GIT_LOCK_GLOBS:
+        for lock_file in glob.iglob(os.path.join(git_dir, pattern), recursive=True):
+            if lock_file != own_lock:
+                yield lock_file
+
+
+# repo_path -> (origin/master sha, time.monotonic() of the fetch that brought it in)
+_last_fetched_tip: dict[str, tuple[str, float]] = {}
+
+# A fetch is skipped only if the last one was this recent and origin/master hasn't moved since.
+# Only master is checked, so only origin/master is guaranteed fresh after a skip; other
+# remote-tracking branches can lag by up to this long.
+FETCH_REUSE_SECONDS = 60
+
+
+def _remote_master_tip(repo_path):
+    """Return the sha of master on origin with one ls-remote round trip (no pack transfer), or None."""
+    res = subprocess.run(["git", "ls-remote", "origin", "refs/heads/master"], cwd=repo_path, capture_output=True, text=True)
+    if res.returncode != 0 or not res.stdout:
+        return None
+    return res.stdout.split(maxsplit=1)[0]
+
+
+def _fetch_is_fresh(repo_path, tip):
+    """True if a recent fetch already brought origin/master to `tip` and the local ref still points there."""
+    cached = _last_fetched_tip.get(repo_path)
+    if tip is None or cached is None:
+        return False
+    sha, fetched_at = cached
+    if sha != tip or time.monotonic() - fetched_at >= FETCH_REUSE_SECONDS:
+        return False
+    res = subprocess.run(["git", "rev-parse", "--verify", "-q", "refs/remotes/origin/master"], cwd=repo_path, capture_output=True, text=True)
+    return res.stdout.strip() == tip
+
+
+@_singleflight
 def prepare_repo(repo_path):
+    """Align master with origin/master. Other remote branches are only refreshed when a fetch runs."""
     print(f"Preparing repo at {repo_path}...")
     logger.info(f"Preparing repo at {repo_path}")
 
+    # Network round trip, so done before taking the lock
+    remote_tip = _remote_master_tip(repo_path)
+
     # Acquire lock for the ENTIRE git preparation sequence
     with repo_lock(repo_path):
+        skip_fetch = _fetch_is_fresh(repo_path, remote_tip)
         # 1. Clean up stale lock files
         logger.info("Cleaning up stale lock files...")
         try:
-            for root, dirs, files in os.walk(os.path.join(repo_path, ".git")):
-                for file in files:
-                    if file.endswith('.lock'):
-                        lock_file = os.path.join(root, file)
-                        try:
-                            os.remove(lock_file)
-                            logger.info(f"✅ Removed stale lock file: {lock_file}")
-                        except Exception as e:
-                            logger.debug(f"Could not remove lock file {lock_file}: {e}")
+            for lock_file in _stale_git_lock_files(repo_path):
+                try:
+                    os.remove(lock_file)
+                    logger.info(f"✅ Removed stale lock file: {lock_file}")
+                except Exception as e:
+                    logger.debug(f"Could not remove lock file {lock_file}: {e}")
         except Exception as e:
             logger.warning(f"Error while cleaning lock files: {e}")
 
         # 2. Clean up corrupt git refs
+        # (not when the fetch is skipped: the refs were just written by it and won't be refetched)
         logger.info("Checking for corrupt git references...")
         refs_dir = os.path.join(repo_path, ".git", "refs", "remotes", "origin")
         try:
-            if os.path.exists(refs_dir):
+            if not skip_fetch and os.path.exists(refs_dir):
                 for item in os.listdir(refs_dir):
                     item_path = os.path.join(refs_dir, item)
                     if os.path.isfile(item_path) and not item.startswith('.'):
@@ -567,73 +1524,108 @@ def prepare_repo(repo_path):
             logger.warning(f"Error while cleaning corrupt refs: {e}")
 
         try:
-            # 3. Prune and Fetch
-            logger.info("Syncing with remote...")
-            subprocess.run(["git", "remote", "prune", "origin"], cwd=repo_path, capture_output=True, text=True)
-            subprocess.run(["git", "fetch", "--all", "--prune"], cwd=repo_path, capture_output=True, text=True)
+            # 3. Fetch (--prune also drops stale remote-tracking refs, so no separate `remote prune`)
+            if skip_fetch:
+                logger.info(f"⏭️ origin/master unchanged at {remote_tip[:12]}, skipping fetch")
+            else:
+                logger.info("Syncing with remote...")
+                fetch_res = _run_git(["fetch", "--all", "--prune"], repo_path)
+                if fetch_res.returncode == 0 and remote_tip:
+                    _last_fetched_tip[repo_path] = (remote_tip, time.monotonic())
+                else:
+                    _last_fetched_tip.pop(repo_path, None)
 
             # 4. Handle uncommitted changes
             logger.info("Checking for uncommitted changes...")
-            status_res = subprocess.run(["git", "status", "--porcelain"], cwd=repo_path, capture_output=True, text=True)
+            status_res = _run_git(["status", "--porcelain"], repo_path)
             if status_res.stdout.strip():
                 logger.warning("⚠️ Unstaged changes detected. Stashing them...")
                 subprocess.run(["git", "stash", "save", "-u", "Auto-stashed by CodeMedic"], cwd=repo_path, capture_output=True, text=True)
 
             # 5. Checkout and Align Master
-            # Instead of 'git pull' which can fail due to divergence, we use fetch + reset --hard
+            # Instead of 'git pull' which can fail due to divergence, we force master to match
+            # origin/master exactly; `checkout -f -B` does checkout + reset --hard in one process
             logger.info("Aligning master with origin/master...")
-            subprocess.run(["git", "checkout", "master"], cwd=repo_path, check=True, capture_output=True)
-            # Force master to match origin/master exactly to avoid "divergent branches" errors
-            subprocess.run(["git", "reset", "--hard", "origin/master"], cwd=repo_path, check=True, capture_output=True)
+            subprocess.run(["git", "checkout", "-f", "-B", "master", "origin/master"], cwd=repo_path, check=True, capture_output=True, text=True)
             
             # Clean up untracked files if any left
-            subprocess.run(["git", "clean", "-fd"], cwd=repo_path, capture_output=True)
+            _run_git(["clean", "-fd"], repo_path)
 
             logger.info("✅ Repository preparation complete.")
             return True, "Repository is ready and aligned with origin/master."
 
         except subprocess.CalledProcessError as e:
-            err_msg = e.stderr.decode() if isinstance(e.stderr, bytes) else str(e.stderr)
+            err_msg = e.stderr
             logger.error(f"❌ Git preparation failed: {err_msg}")
             return False, f"Git preparation failed: {err_msg}"
         except Exception as e:
             logger.error(f"❌ Unexpected error during repo prep: {e}")
             return False, f"Unexpected error: {e}"
 
+def has_changes(repo_path):
+    """
+    Whether get_git_diff has anything to show. A fix/* branch is diffed against
+    origin/master, so it always counts; otherwise a porcelain status (cheaper than
+    building the diff) tells whether the working tree differs from HEAD.
+    """
+    branch = get_current_branch(repo_path)
+    if branch and branch.startswith("fix/"):
+        return True
+    # Untracked files don't show up in `git diff HEAD` either, so leave them out
+    result = _run_git(["status", "--porcelain=v2", "-z", "--untracked-files=no"], repo_path)
+    # On failure, let get_git_diff run and report the error
+    return result.returncode != 0 or bool(result.stdout)
+
+def _git_diff_cmd(repo_path):
+    """The diff to show for a repo; call with the repo lock held."""
+    # Check if we're on a feature branch (fix/*)
+    branch = get_current_branch(repo_path)
+
+    if branch and branch.startswith("fix/"):
+        # On a feature branch - show diff between origin/master and current HEAD
+        # This shows what changes will be in the PR
+        return ["git", "diff", "--no-color", "origin/master...HEAD", "--"] + _IDE_EXCLUSIONS
+    # Not on a feature branch - show staged/unstaged changes
+    return ["git", "diff", "--no-color", "HEAD", "--"] + _IDE_EXCLUSIONS
+
 def get_git_diff(repo_path):
     try:
-        # Build pathspec exclusions for IDE files
-        # Format: ':!pattern' excludes files matching pattern
-        exclusions = [f":!{pattern}" for pattern in IDE_FILE_PATTERNS]
-        # Also exclude files containing these patterns in path
-        exclusions.extend([f":!**/{pattern}" for pattern in IDE_FILE_PATTERNS])
-        exclusions.extend([f":!**/{pattern}/**" for pattern in IDE_FILE_PATTERNS])
-
-        # Check if we're on a feature branch (fix/*)
-        branch = get_current_branch(repo_path)
-
-        if branch and branch.startswith("fix/"):
-            # On a feature branch - show diff between origin/master and current HEAD
-            # This shows what changes will be in the PR
-            cmd = ["git", "diff", "origin/master...HEAD", "--"] + exclusions
-            result = subprocess.run(
-                cmd,
-                cwd=repo_path, capture_output=True, text=True, check=True
-            )
-            return result.stdout
-        else:
-            # Not on a feature branch - show staged/unstaged changes
-            cmd = ["git", "diff", "HEAD", "--"] + exclusions
+        # Read-only: shares the repo lock with other readers, but never sees a writer mid-checkout
+        with repo_lock(repo_path, exclusive=False):
+            cmd = _git_diff_cmd(repo_path)
             result = subprocess.run(cmd, cwd=repo_path, capture_output=True, text=True, check=True)
             return result.stdout
     except Exception as e:
         return f"Error getting diff: {e}"
 
+def spool_git_diff(repo_path):
+    """
+    Write the same diff as get_git_diff to an anonymous temp file, so it can be streamed
+    without holding it in memory. The shared repo lock covers only the git run, never
+    the reader. Returns (True, file positioned at the start) or (False, error message).
+    """
+    spool = tempfile.TemporaryFile()
+    try:
+        with repo_lock(repo_path, exclusive=False):
+            result = subprocess.run(
+                _git_diff_cmd(repo_path), cwd=repo_path, stdout=spool, stderr=subprocess.PIPE
+            )
+        if result.returncode != 0:
+            spool.close()
+            return False, f"Error getting diff: {result.stderr.decode('utf-8', errors='replace').strip()}"
+        spool.seek(0)
+        return True, spool
+    except Exception as e:
+        spool.close()
+        return False, f"Error getting diff: {e}"
+
 def discard_changes(repo_path):
     try:
-        subprocess.run(["git", "checkout", "."], cwd=repo_path, check=True)
-        subprocess.run(["git", "clean", "-fd"], cwd=repo_path, check=True)
+        subprocess.run(["git", "checkout", "."], cwd=repo_path, check=True, capture_output=True, text=True)
+        subprocess.run(["git", "clean", "-fd"], cwd=repo_path, check=True, capture_output=True, text=True)
         return True, "Changes discarded."
+    except subprocess.CalledProcessError as e:
+        return False, f"Error discarding changes: {e.stderr or e}"
     except Exception as e:
         return False, f"Error discarding changes: {e}"
 
@@ -644,33 +1636,24 @@ def run_git_commands(repo_path, message):
             safe_message = message.split('\n')[0][:100] # Take first line, max 100 chars
 
             # Checkout new branch with random suffix to avoid collisions
-            import time
-            import random
             ts = int(time.time())
             rand_suffix = random.randint(1000, 9999)
             branch_name = f"fix/error-{ts}-{rand_suffix}"
 
-            subprocess.run(["git", "checkout", "-b", branch_name], cwd=repo_path, check=False, capture_output=True)
+            subprocess.run(["git", "checkout", "-b", branch_name], cwd=repo_path, check=False, capture_output=True, text=True)
 
             # Add changes
-            subprocess.run(["git", "add", "."], cwd=repo_path, check=True, capture_output=True)
+            subprocess.run(["git", "add", "."], cwd=repo_path, check=True, capture_output=True, text=True)
 
-            # Unstage IDE files using centralized helper
-            unstage_ide_files(repo_path)
+            # Unstage IDE files using centralized helper; it also reports what is left staged
+            staged_files = unstage_ide_files(repo_path)
 
             # Log what's actually staged after cleanup
-            result = subprocess.run(["git", "diff", "--cached", "--name-only"], cwd=repo_path, capture_output=True, text=True)
-            staged_files = result.stdout.strip()
+            # The staged file list doubles as the "anything to commit?" check
             if staged_files:
-                logger.info(f"Staged files for commit:\n{staged_files}")
+                logger.info("Staged files for commit:\n" + "\n".join(staged_files))
             else:
                 logger.warning("No files staged after IDE file exclusion!")
-
-            # Check if we have anything to commit
-            # git diff --cached --exit-code returns 1 if there are changes, 0 if clean
-            diff_result = subprocess.run(["git", "diff", "--cached", "--quiet"], cwd=repo_path, capture_output=True)
-            
-            if diff_result.returncode == 0:
                 return False, "OpenCode completed successfully, but NO file changes were detected to commit. It might have failed to find the code."
             
             # Commit
@@ -682,15 +1665,29 @@ def run_git_commands(repo_path, message):
                 "git", "commit", "--no-verify",
                 "-m", safe_message,
                 "--author", "CodeMedic Bot <codemedic@automated.local>"
-            ], cwd=repo_path, check=True, capture_output=True, env=commit_env)
+            ], cwd=repo_path, check=True, capture_output=True, text=True, env=commit_env)
             
             return True, f"Success! Fix committed to branch: {branch_name}"
     except subprocess.CalledProcessError as e:
-        error_details = e.stderr if isinstance(e.stderr, str) else (e.stderr.decode('utf-8') if e.stderr else str(e))
+        error_details = e.stderr or str(e)
         return False, f"Git command failed:\n{error_details}"
 
 def get_current_branch(repo_path):
     """Get the current git branch name."""
+    # Read .git/HEAD directly instead of forking git on every diff, push and PR call.
+    # Anything else (e.g. a .git file pointing at another gitdir) falls back to rev-parse.
+    try:
+        with open(os.path.join(repo_path, ".git", "HEAD")) as f:
+            head = f.read().strip()
+    except OSError:
+        head = None
+    if head is not None:
+        if head.startswith("ref: refs/heads/"):
+            return head[len("ref: refs/heads/"):]
+        if not head.startswith("ref:"):
+            # Detached HEAD holds a bare sha; rev-parse --abbrev-ref reports it as "HEAD"
+            return "HEAD"
+
     try:
         result = subprocess.run(
             ["git", "rev-parse", "--abbrev-ref", "HEAD"],
@@ -714,42 +1711,57 @@ def is_worktree_branch_ready(repo_path):
     2. It has an upstream tracking branch
     3. Local and remote are in sync (no commits to push)
     """
-    branch = get_current_branch(repo_path)
-    if not branch or not branch.startswith("fix/"):
-        return False, branch
-
-    # Check if branch has upstream and is in sync
+    # A single for-each-ref reports the checked-out branch ("*" in %(HEAD)) and how it
+    # compares to its upstream, instead of separate rev-parse and rev-list processes.
+    # %(upstream:trackshort) is "=" in sync, ">" ahead, "<" behind, "<>" diverged,
+    # and empty when there is no upstream or it is gone.
     try:
-        # Get the upstream branch
-        result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", f"{branch}@{{upstream}}"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True
-        )
+        with repo_lock(repo_path, exclusive=False):
+            result = subprocess.run(
+                ["git", "for-each-ref", "--format=%(HEAD)%00%(refname:short)%00%(upstream:trackshort)", "refs/heads/"],
+                cwd=repo_path,
+                capture_output=True,
+                text=True
+            )
         if result.returncode != 0:
-            # No upstream set
-            return False, branch
-
-        # Check if local is behind or ahead of remote
-        result = subprocess.run(
-            ["git", "rev-list", "--left-right", "--count", f"{branch}...origin/{branch}"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            parts = result.stdout.strip().split()
-            if len(parts) == 2:
-                ahead, behind = int(parts[0]), int(parts[1])
-                # Branch is ready if we're not ahead (nothing to push)
-                if ahead == 0:
-                    return True, branch
-
-        return False, branch
+            return False, None
+
+        for line in result.stdout.splitlines():
+            is_head, branch, track = line.split('\0')
+            if is_head != '*':
+                continue
+            if not branch.startswith("fix/"):
+                return False, branch
+            # Branch is ready if we're not ahead (nothing to push)
+            return track in ("=", "<"), branch
+
+        # Detached HEAD or unborn branch
+        return False, None
     except Exception:
-        return False, branch
+        return False, None
+
 
+def push_branches(repo_path, branches):
+    """Push several branches to origin with upstream tracking, in one git push (one connection)."""
+    if not branches:
+        return True, "Nothing to push."
+    try:
+        # `push -u` writes upstream config for every branch, so hold the lock like push_branch
+        with repo_lock(repo_path):
+            result = subprocess.run(
+                ["git", "push", "-u", "origin", *branches],
+                cwd=repo_path,
+                capture_output=True,
+                text=True
+            )
+
+        if result.returncode != 0:
+            error_msg = result.stderr or result.stdout
+            return False, f"Push failed:\n{error_msg}"
+
+        return True, f"Successfully pushed {len(branches)} branch(es) to origin."
+    except Exception as e:
+        return False, f"Error pushing branches: {e}"
 
 def push_branch(repo_path):
     """Push the current branch to the remote origin."""
@@ -768,14 +1780,32 @@ def push_branch(repo_path):
             text=True
         )
 
-        if result.returncode != 0:
-            error_msg = result.stderr or result.stdout
-            return False, f"Push failed:\n{error_msg}"
+        return _push_result(result, branch)
+    except Exception as e:
+        return False, f"Error pushing branch: {e}"
 
-        return True, f"Successfully pushed branch '{branch}' to origin."
+async def push_branch_async(repo_path):
+    """Async push_branch for the API server; no thread is held during the network round trip."""
+    try:
+        async with repo_lock_async(repo_path):
+            branch = get_current_branch(repo_path)
+            if not branch:
+                return False, "Could not determine current branch."
+
+            # Push with upstream tracking
+            result = await _run_async(["git", "push", "-u", "origin", branch], repo_path)
+
+        return _push_result(result, branch)
     except Exception as e:
         return False, f"Error pushing branch: {e}"
 
+def _push_result(result, branch):
+    if result.returncode != 0:
+        error_msg = result.stderr or result.stdout
+        return False, f"Push failed:\n{error_msg}"
+
+    return True, f"Successfully pushed branch '{branch}' to origin."
+
 def create_pull_request(repo_path, title, body=None, branch_name=None):
     """
     Create a pull request using GitHub CLI (gh).
@@ -789,43 +1819,151 @@ def create_pull_request(repo_path, title, body=None, branch_name=None):
                      regardless of current checkout state.
     """
     try:
-        # Use provided branch_name or fall back to current branch
-        if branch_name:
-            branch = branch_name
-            logger.info(f"Creating PR for explicitly specified branch: {branch}")
-        else:
-            branch = get_current_branch(repo_path)
-            if not branch:
-                return False, "Could not determine current branch.", None
+        pr = _pr_fields(repo_path, title, body, branch_name)
+        if pr is None:
+            return False, "Could not determine current branch.", None
 
-        # Build gh pr create command
-        # Use --head to specify the branch explicitly (works even if not checked out)
-        cmd = ["gh", "pr", "create", "--title", title, "--base", "master", "--head", branch]
-
-        if body:
-            cmd.extend(["--body", body])
-        else:
-            cmd.extend(["--body", f"Automated fix for error:\n\n{title}"])
+        # Straight to the REST API when possible; gh is the fallback
+        api_result = _create_pull_request_api(repo_path, pr)
+        if api_result is not None:
+            return api_result
 
         result = subprocess.run(
-            cmd,
+            _pr_command(pr),
             cwd=repo_path,
             capture_output=True,
             text=True
         )
 
-        if result.returncode != 0:
-            error_msg = result.stderr or result.stdout
-            return False, f"PR creation failed:\n{error_msg}", None
+        return _pr_result(result)
+    except FileNotFoundError:
+        return False, "GitHub CLI (gh) is not installed. Please install it with: brew install gh", None
+    except Exception as e:
+        return False, f"Error creating pull request: {e}", None
 
-        # The output typically contains the PR URL
-        pr_url = result.stdout.strip()
-        return True, f"Pull request created successfully!", pr_url
+async def create_pull_request_async(repo_path, title, body=None, branch_name=None):
+    """Async create_pull_request for the API server; gh runs as an asyncio subprocess."""
+    try:
+        pr = _pr_fields(repo_path, title, body, branch_name)
+        if pr is None:
+            return False, "Could not determine current branch.", None
+
+        api_result = await asyncio.to_thread(_create_pull_request_api, repo_path, pr)
+        if api_result is not None:
+            return api_result
+
+        result = await _run_async(_pr_command(pr), repo_path)
+
+        return _pr_result(result)
     except FileNotFoundError:
         return False, "GitHub CLI (gh) is not installed. Please install it with: brew install gh", None
     except Exception as e:
         return False, f"Error creating pull request: {e}", None
 
+def _pr_fields(repo_path, title, body, branch_name):
+    """The PR to open as GitHub API fields, or None if no branch could be determined."""
+    # Use provided branch_name or fall back to current branch
+    if branch_name:
+        branch = branch_name
+        logger.info(f"Creating PR for explicitly specified branch: {branch}")
+    else:
+        branch = get_current_branch(repo_path)
+        if not branch:
+            return None
+
+    return {
+        "title": title,
+        "head": branch,
+        "base": "master",
+        "body": body or f"Automated fix for error:\n\n{title}",
+    }
+
+def _pr_command(pr):
+    # Build gh pr create command
+    # Use --head to specify the branch explicitly (works even if not checked out)
+    return ["gh", "pr", "create", "--title", pr["title"], "--base", pr["base"], "--head", pr["head"], "--body", pr["body"]]
+
+def _pr_result(result):
+    if result.returncode != 0:
+        error_msg = result.stderr or result.stdout
+        return False, f"PR creation failed:\n{error_msg}", None
+
+    # The output typically contains the PR URL
+    pr_url = result.stdout.strip()
+    return True, f"Pull request created successfully!", pr_url
+
+# GitHub REST access for PR creation, so each PR is one HTTPS request instead of a gh launch.
+# The token (from `gh auth token`) and each repo's owner/name are cached once found; one
+# keep-alive connection is reused under a lock.
+_GITHUB_REMOTE_RE = re.compile(r"github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$")
+_github_token = None
+_github_repos: dict[str, str] = {}
+_github_conn = None
+_github_lock = threading.Lock()
+
+def _github_auth_token():
+    """gh's token, cached once found; a missing one is looked up again next time (gh auth login may have run since)."""
+    global _github_token
+    if not _github_token:
+        try:
+            res = subprocess.run(["gh", "auth", "token"], capture_output=True, text=True)
+        except FileNotFoundError:
+            return None
+        _github_token = res.stdout.strip() if res.returncode == 0 else None
+    return _github_token
+
+def _github_repo(repo_path):
+    """
+    owner/name of the repo's GitHub origin, or None if origin isn't on github.com.
+    Only a match is cached; a miss is looked up again (the remote may be added or changed).
+    """
+    repo = _github_repos.get(repo_path)
+    if repo is None:
+        res = subprocess.run(["git", "config", "--get", "remote.origin.url"], cwd=repo_path, capture_output=True, text=True)
+        match = _GITHUB_REMOTE_RE.search(res.stdout.strip())
+        if match:
+            repo = _github_repos[repo_path] = f"{match.group(1)}/{match.group(2)}"
+    return repo
+
+def _create_pull_request_api(repo_path, pr):
+    """
+    Open the PR with GitHub's REST API. Returns create_pull_request's result tuple,
+    or None when the API can't be used or refuses, so the caller falls back to gh.
+    """
+    global _github_conn, _github_token
+    repo = _github_repo(repo_path)
+    token = _github_auth_token() if repo else None
+    if not token:
+        return None
+
+    headers = {
+        "Authorization": f"token {token}",
+        "Accept": "application/vnd.github+json",
+        "Content-Type": "application/json",
+        "User-Agent": "CodeMedic",
+    }
+    with _github_lock:
+        try:
+            if _github_conn is None:
+                _github_conn = http.client.HTTPSConnection("api.github.com", timeout=30)
+            _github_conn.request("POST", f"/repos/{repo}/pulls", body=json.dumps(pr), headers=headers)
+            response = _github_conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            # Not retried here: the POST may have reached GitHub; gh reports what happened
+            logger.warning(f"GitHub API request failed, falling back to gh: {e}")
+            _github_conn.close()
+            _github_conn = None
+            return None
+
+    if response.status != 201:
+        if response.status == 401:
+            # Expired or rotated: forget it so the next PR asks gh for the current one
+            _github_token = None
+        logger.warning(f"GitHub API returned {response.status}, falling back to gh")
+        return None
+    return True, f"Pull request created successfully!", json.loads(data)["html_url"]
+
 if __name__ == "__main__":
     def main():
         config = load_config()
@@ -844,12 +1982,14 @@ if __name__ == "__main__":
              # Legacy or single path fallback
              repo_path = config.get("repo_path")
         
-        # Check for command line argument for log path
-        if len(sys.argv) > 1:
-            log_path = sys.argv[1]
-        else:
-            log_path = None
-        
+        # Command line arguments: log path and optional tail window
+        arg_parser = argparse.ArgumentParser(description="Cluster errors in a log file and fix them with OpenCode.")
+        arg_parser.add_argument("log_path", nargs="?", help="Path to the log file")
+        arg_parser.add_argument("--tail", type=int, metavar="BYTES",
+                                help="Only parse the last BYTES of the log (most recent errors)")
+        args = arg_parser.parse_args()
+        log_path = args.log_path
+
         if not repo_path:
              print("Error: Missing repo_path in config.")
              return
@@ -860,7 +2000,14 @@ if __name__ == "__main__":
             return
 
         # 1. Parse & Cluster Logs
-        errors = parse_log_clusters(log_path)
+        try:
+            if args.tail:
+                errors = parse_log_clusters(log_path, tail_bytes=args.tail)
+            else:
+                errors = parse_log_clusters_parallel(log_path)
+        except FileNotFoundError:
+            print(f"Error: Log file not found at {log_path}")
+            sys.exit(1)
         if not errors:
             print("No errors found in the log.")
             return
@@ -870,44 +2017,68 @@ if __name__ == "__main__":
         print(f"{'ID':<5} | {'Count':<8} | {'Error Message'}")
         print(f"{'-'*60}")
         
-        for idx, err in enumerate(errors):
-            msg_display = (err['message'][:70] + '...') if len(err['message']) > 70 else err['message']
-            print(f"[{idx+1:<3}] | {err['count']:<8} | {msg_display}")
+        # Build the whole table and print it once rather than a write per row
+        print("\n".join(
+            f"[{idx+1:<3}] | {err['count']:<8} | {(err['message'][:70] + '...') if len(err['message']) > 70 else err['message']}"
+            for idx, err in enumerate(errors)
+        ))
         print(f"{'='*60}\n")
         
-        selection = input("Select an error ID to fix (or 'q' to quit): ").strip()
+        selection = input("Select error ID(s) to fix, comma-separated (or 'q' to quit): ").strip()
         if selection.lower() == 'q':
             return
-            
+
         try:
-            sel_idx = int(selection) - 1
-            if sel_idx < 0 or sel_idx >= len(errors):
+            sel_indices = [int(part) - 1 for part in selection.split(',') if part.strip()]
+            if not sel_indices or any(idx < 0 or idx >= len(errors) for idx in sel_indices):
                 print("Invalid selection.")
                 return
         except ValueError:
             print("Invalid input.")
             return
-            
-        selected_error = errors[sel_idx]
-        print(f"\nSelected: {selected_error['message']}")
-        
+
+        for idx in sel_indices:
+            print(f"\nSelected: {errors[idx]['message']}")
+
         # 3. Apply Fix via OpenCode
-        print(f"Delegating fix to OpenCode...")
-        success = False
-        msg = ""
-        
-        for item in run_opencode_fix(repo_path, selected_error['trace']):
-            if isinstance(item, tuple):
-                 success, msg = item
+        # Each fix runs in its own worktree and is registered under its own job_id,
+        # so several errors can be fixed concurrently.
+        print(f"Delegating {len(sel_indices)} fix(es) to OpenCode...")
+
+        # With several fixes, the branches are pushed together afterwards in one git push,
+        # and none is checked out: the main checkout would end up on whichever finished last
+        push_each = len(sel_indices) == 1
+
+        def fix_error(idx):
+            success = False
+            msg = ""
+            branch = None
+            for item in run_opencode_fix(repo_path, errors[idx]['trace'], job_id=f"cli-{idx+1}", push=push_each, checkout=push_each):
+                if isinstance(item, tuple):
+                     success, msg = item[0], item[1]
+                     branch = item[2] if len(item) == 3 else None
+                else:
+                     print(f"[OpenCode #{idx+1}] {item}")
+            return idx, success, msg, branch
+
+        with ThreadPoolExecutor(max_workers=len(sel_indices)) as executor:
+            results = list(executor.map(fix_error, sel_indices))
+
+        # The worktree flow commits each fix to its own branch
+        for idx, success, msg, _ in results:
+            if success:
+                print(f"[#{idx+1}] {msg}")
             else:
-                 print(f"[OpenCode] {item}")
-        
-        if success:
-            print("Fix applied by OpenCode.")
-            # 5. Git Ops
-            git_success, git_msg = run_git_commands(repo_path, f"Fix: {selected_error['message']}")
-            print(git_msg)
-        else:
-            print(f"Failed to apply fix: {msg}")
+                print(f"[#{idx+1}] Failed to apply fix: {msg}")
+
+        if not push_each:
+            branches = [branch for _, success, _, branch in results if success and branch]
+            if branches:
+                print(f"Pushing {len(branches)} branch(es) to origin...")
+                _, push_msg = push_branches(repo_path, branches)
+                print(push_msg)
+                print(f"Your checkout was left on {get_current_branch(repo_path)}. Fixes are on these branches:")
+                for branch in branches:
+                    print(f"  {branch}")
 
     main()
@@ -7,12 +7,40 @@ st.set_page_config(page_title="CodeMedic", layout="wide")
 
 st.title("🩺 CodeMedic Dashboard")
 
-# --- Sidebar: Configuration ---
+# Streamlit reruns this whole script on every widget interaction, so anything
+# that shells out or reads files is memoized across reruns
+
+@st.cache_resource(show_spinner=False)
+def bootstrap():
+    # App-wide startup state in one cached object: `opencode models` (a subprocess)
+    # and config.json are loaded once, until "Reload Config" clears it
+    return {"models": agent.get_available_models(), "config": agent.load_config()}
+
+
+# Persisted to disk so large logs aren't re-parsed after a dashboard restart. No ttl:
+# Streamlit ignores it for persisted caches, and the key already tracks the file
+@st.cache_data(persist="disk", max_entries=8, show_spinner=False)
+def parse_log_clusters_cached(log_path, mtime_ns, size):
+    # mtime_ns and size are only part of the cache key, so editing the log invalidates it
+    return agent.parse_log_clusters(log_path)
+
+
+def analyze_log(log_path):
+    try:
+        stat = os.stat(log_path)
+    except OSError:
+        # Let the parser raise for the missing/unreadable file
+        return agent.parse_log_clusters(log_path)
+    return parse_log_clusters_cached(log_path, stat.st_mtime_ns, stat.st_size)
+
+
 # --- Sidebar: Configuration ---
 st.sidebar.header("Configuration")
 
+app_state = bootstrap()
+
 # Available Models
-available_models = agent.get_available_models()
+available_models = app_state["models"]
 default_model_index = 0
 desired_default = "opencode/glm-4.7-free"
 
@@ -22,7 +50,7 @@ if desired_default in available_models:
 selected_model = st.sidebar.selectbox("Select AI Model", available_models, index=default_model_index)
 
 # Load defaults from config file if available
-repo_config = agent.load_config()
+repo_config = app_state["config"]
 repo_names = list(repo_config.keys()) if isinstance(repo_config, dict) else []
 
 log_path = st.sidebar.text_input("Log File Path")
@@ -35,62 +63,24 @@ if not repo_path and not repo_names:
      repo_path = st.sidebar.text_input("Repository Path (Manual)")
 
 if st.sidebar.button("Reload Config"):
-    st.experimental_rerun()
-
-# --- Main Logic ---
-
-if not log_path or not repo_path:
-    st.warning("Please configure Log File Path and Repository Path in the sidebar.")
-    st.stop()
-
-# 1. Analyze Logs
-st.header("1. Log Analysis")
-
-if "errors" not in st.session_state:
-    st.session_state.errors = []
-
-if st.button("Analyze Logs"):
-    with st.spinner("Parsing logs..."):
-        errors = agent.parse_log_clusters(log_path)
-        st.session_state.errors = errors
-        if not errors:
-            st.info("No errors found in the log.")
-        else:
-            st.success(f"Found {len(errors)} unique error clusters.")
-
-if st.session_state.errors:
-    # Convert to DataFrame for display
-    df = pd.DataFrame(st.session_state.errors)
-    # Reorder columns
-    df = df[["count", "message"]]
-    
-    st.subheader("Error Clusters")
-    
-    # Interactive Table
-    selected_indices = st.dataframe(
-        df,
-        use_container_width=True,
-        on_select="rerun", # Requires Streamlit 1.35+, fallback handled if older
-        selection_mode="single-row"
-    )
-    
-    # Handle selection (Streamlit version dependent, simplified fallback)
-    selected_row_idx = None
-    if hasattr(selected_indices, "selection") and selected_indices.selection.rows:
-         selected_row_idx = selected_indices.selection.rows[0]
-    
-    # --- Detail View & Fix ---
+    bootstrap.clear()
+    st.rerun()
+
+# --- Detail View & Fix ---
+# A fragment: picking another error or clicking the fix/review buttons reruns only
+# this panel, not the sidebar, log analysis and cluster table above it
+@st.fragment
+def error_detail_fragment(errors, error_options, repo_path, selected_model, selected_row_idx):
     st.header("2. Error Details & Fix")
     
     # Fallback selection UI if dataframe interactive selection isn't working/available
     # or just to be explicit
-    error_options = [f"[{e['count']}] {e['message'][:80]}..." for e in st.session_state.errors]
     selected_option = st.selectbox("Select an Error to Fix:", error_options, index=selected_row_idx if selected_row_idx is not None else 0)
     
     if selected_option:
         # Find index in original list
         idx = error_options.index(selected_option)
-        selected_error = st.session_state.errors[idx]
+        selected_error = errors[idx]
         
         st.markdown(f"**Full Error Context:**")
         st.code(selected_error['trace'], language="text")
@@ -139,18 +129,19 @@ if st.session_state.errors:
                         st.success("OpenCode has finished. Please review changes below.")
                         st.session_state.fix_applied = True
                         st.session_state.fix_message = f"Fix: {selected_error['message']}"
-                        st.rerun()
+                        # No rerun needed: the review phase below reads fix_applied in this same pass
                     else:
                         status.update(label="Fix Failed", state="error")
                         st.error(msg)
         
-        # Review Phase
+        # Review Phase (driven by session state, so it appears as soon as a fix completes)
         if st.session_state.fix_applied:
             st.header("Review Changes")
             st.info("Review the changes made by OpenCode before committing.")
             
             # Show Diff
-            diff = agent.get_git_diff(repo_path)
+            # A clean tree skips building the diff altogether
+            diff = agent.get_git_diff(repo_path) if agent.has_changes(repo_path) else ""
             if not diff.strip():
                 st.warning("No changes detected in the repository.")
             else:
@@ -177,6 +168,58 @@ if st.session_state.errors:
                      if disc_success:
                          st.warning("Changes discarded.")
                          st.session_state.fix_applied = False
-                         st.rerun()
+                         st.rerun(scope="fragment")
                      else:
                          st.error(disc_msg)
+
+# --- Main Logic ---
+
+if not log_path or not repo_path:
+    st.warning("Please configure Log File Path and Repository Path in the sidebar.")
+    st.stop()
+
+# 1. Analyze Logs
+st.header("1. Log Analysis")
+
+if "errors" not in st.session_state:
+    st.session_state.errors = []
+
+if st.button("Analyze Logs"):
+    with st.spinner("Parsing logs..."):
+        try:
+            errors = analyze_log(log_path)
+        except FileNotFoundError:
+            st.error(f"Log file not found at {log_path}")
+            st.stop()
+        st.session_state.errors = errors
+        if not errors:
+            st.info("No errors found in the log.")
+        else:
+            st.success(f"Found {len(errors)} unique error clusters.")
+
+if st.session_state.errors:
+    # Convert to DataFrame for display; only the shown columns, so traces are never copied in
+    df = pd.DataFrame(st.session_state.errors, columns=["count", "message"])
+    df["count"] = df["count"].astype("int32")
+    # Selectbox labels for the detail panel, built column-wise rather than per error
+    error_options = ("[" + df["count"].astype(str) + "] " + df["message"].str.slice(0, 80) + "...").tolist()
+    # The table shows a truncated message; as a categorical, repeated prefixes are stored
+    # and sent to the frontend once
+    df["message"] = df["message"].str.slice(0, 160).astype("category")
+    
+    st.subheader("Error Clusters")
+    
+    # Interactive Table
+    selected_indices = st.dataframe(
+        df,
+        use_container_width=True,
+        on_select="rerun", # Requires Streamlit 1.35+, fallback handled if older
+        selection_mode="single-row"
+    )
+    
+    # Handle selection (Streamlit version dependent, simplified fallback)
+    selected_row_idx = None
+    if hasattr(selected_indices, "selection") and selected_indices.selection.rows:
+         selected_row_idx = selected_indices.selection.rows[0]
+    
+    error_detail_fragment(st.session_state.errors, error_options, repo_path, selected_model, selected_row_idx)
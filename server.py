@@ -1,38 +1,63 @@
 from fastapi import FastAPI, HTTPException, Body, UploadFile, File, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import List, Optional
 import agent
+import hashlib
+import io
 import os
 import subprocess
 import asyncio
 import json
 import tempfile
 import shutil
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
+import queue
+import secrets
 import sys
 import uuid
+import threading
 import time
-from collections import defaultdict
-from contextlib import contextmanager
+import anyio.to_thread
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 
 # Configure logging
 LOG_FILE = "/tmp/codemedic.log"
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(LOG_FILE)
-    ]
-)
+# Request-level diagnostics are DEBUG; set CODEMEDIC_LOG_LEVEL=INFO to quiet them
+LOG_LEVEL = os.environ.get("CODEMEDIC_LOG_LEVEL", "DEBUG").upper()
+# Request handlers only enqueue records; the stdout and file writes happen on the
+# listener's own thread so a slow terminal or disk never stalls a request
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_file_handler = logging.FileHandler(LOG_FILE)
+_file_handler.setFormatter(_log_handler.formatter)
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler, _file_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+# Only the message is merged in before queueing; the listener's handlers apply the format
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+# agent configures logging on import; the server owns the process, so replace it
+logging.basicConfig(level=LOG_LEVEL, handlers=[_queue_handler], force=True)
 logger = logging.getLogger(__name__)
 
 # --- Job Registry for Queue Visibility ---
 # Stores list of jobs per repo_path
 # Structure: { repo_path: [ { id, type, status, created_at, details } ] }
-job_registry = defaultdict(list)
+# repo_path -> {job_id: job_info}; keyed by id so finishing a job is a single pop
+job_registry = defaultdict(dict)
+# Jobs are added and removed on the event loop, but /queue is a sync endpoint that reads
+# from a worker thread; the lock keeps it from iterating while a dict changes size, and
+# keeps a repo's key from being dropped just as another job is added under it.
+# Held only for the dict operations themselves, never across a job.
+_job_registry_lock = threading.Lock()
 
 @contextmanager
 def track_job(repo_path: str, job_type: str, details: str = ""):
@@ -40,7 +65,8 @@ def track_job(repo_path: str, job_type: str, details: str = ""):
     Context manager to track a job in the global registry.
     This provides visibility into what is currently running or queued (waiting for lock).
     """
-    job_id = str(uuid.uuid4())
+    # 64 random bits: unique among the handful of jobs alive at once
+    job_id = secrets.token_hex(8)
     job_info = {
         "id": job_id,
         "type": job_type,
@@ -50,37 +76,155 @@ def track_job(repo_path: str, job_type: str, details: str = ""):
     }
     
     # Add to registry
-    job_registry[repo_path].append(job_info)
+    with _job_registry_lock:
+        job_registry[repo_path][job_id] = job_info
     logger.info(f"➕ Job added to queue: {job_type} for {repo_path} (ID: {job_id})")
     
     try:
         yield job_id
     finally:
         # Remove from registry upon completion OR mark as done if we wanted history
-        if repo_path in job_registry:
-            # Filter out this job
-            job_registry[repo_path] = [j for j in job_registry[repo_path] if j["id"] != job_id]
-            # Clean up empty keys
-            if not job_registry[repo_path]:
-                del job_registry[repo_path]
+        with _job_registry_lock:
+            jobs = job_registry.get(repo_path)
+            if jobs is not None:
+                jobs.pop(job_id, None)
+                # Clean up empty keys
+                if not jobs:
+                    del job_registry[repo_path]
         logger.info(f"➖ Job removed from queue: {job_type} for {repo_path} (ID: {job_id})")
 
-app = FastAPI(title="CodeMedic API")
+# Log parsing is CPU-bound, so it runs in worker processes rather than holding
+# one of the threads that serve the sync endpoints (and the GIL) for seconds.
+# Workers come from a forkserver rather than a fork of this process: the log listener
+# thread may hold a handler or stdout lock at the moment of a fork, and the child would
+# inherit it held. A fresh worker gets its own handlers from importing agent, which the
+# initializer does before applying the server's level. The pool is built on first use,
+# so a worker that re-imports this module as __main__ doesn't build one of its own.
+_parse_pool = None
+
+def _get_parse_pool():
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=agent.set_log_level,
+            initargs=(LOG_LEVEL,),
+        )
+    return _parse_pool
+
+# Local git work (sync, diff, commit, discard) runs on its own bounded pool, so a burst of
+# repo requests can't take every thread the sync endpoints share. Per-repo work is
+# serialized by repo_lock anyway; a few workers cover several repos at once.
+GIT_WORKERS = min(8, os.cpu_count() or 4)
+_git_pool = ThreadPoolExecutor(max_workers=GIT_WORKERS, thread_name_prefix="git")
+
+
+async def _run_git_task(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_git_pool, func, *args)
+
+# One repo-changing request per repo at a time, queued on the event loop: repo_lock would
+# serialize them anyway, but each waiter would hold a git worker (or thread) while it waits
+_repo_gates: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+async def _run_repo_task(repo_path, func, *args):
+    """_run_git_task for work that changes repo_path (checkout, commit, discard)."""
+    async with _repo_gates[repo_path]:
+        return await _run_git_task(func, repo_path, *args)
+
+
+async def _push_branch(repo_path):
+    async with _repo_gates[repo_path]:
+        return await agent.push_branch_async(repo_path)
+
+# In-flight file parses by input key; concurrent requests for the same log await one pool task
+_inflight_parses: dict[tuple, asyncio.Future] = {}
+
+# Finished parse results by input key, least recently used first: (path, mtime_ns, size)
+# for files and ("content", blake2b digest) for pasted logs. Only touched on the event loop.
+PARSE_RESULT_CACHE_SIZE = 32
+_parse_results: OrderedDict[tuple, list] = OrderedDict()
+_parse_result_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _cached_parse_result(key):
+    errors = _parse_results.get(key)
+    if errors is not None:
+        _parse_results.move_to_end(key)
+        _parse_result_stats["hits"] += 1
+    else:
+        _parse_result_stats["misses"] += 1
+    return errors
+
+
+def _store_parse_result(key, errors):
+    _parse_results[key] = errors
+    _parse_results.move_to_end(key)
+    while len(_parse_results) > PARSE_RESULT_CACHE_SIZE:
+        _parse_results.popitem(last=False)
+        _parse_result_stats["evictions"] += 1
+
+
+def _parse_once(key, func, *args):
+    """Run func(*args) in the parse pool, sharing one task per key and caching its result."""
+    future = _inflight_parses.get(key)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_get_parse_pool(), func, *args)
+        _inflight_parses[key] = future
+
+        def done(f):
+            _inflight_parses.pop(key, None)
+            if not f.cancelled() and f.exception() is None:
+                _store_parse_result(key, f.result())
+        future.add_done_callback(done)
+    return future
+
+# Threads available to the remaining sync endpoints (config, models, queue, cleanup, cancel);
+# git work has its own pool above and opencode runs as an asyncio subprocess
+THREAD_LIMIT = 100
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_LIMIT
+    yield
+    for upload_id in list(_chunked_uploads):
+        if _chunked_uploads[upload_id]["fd"] is not None:
+            _drop_upload(upload_id)
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+    _git_pool.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(title="CodeMedic API", lifespan=lifespan)
+
+# Request bodies are only logged at DEBUG, and only when small enough to read up front;
+# reading a body here buffers all of it before the endpoint runs, so uploads and the
+# fix stream are never touched
+LOG_BODY_MAX_BYTES = 4096
+_NO_BODY_LOG_PREFIXES = ("/logs/upload", "/fix/start")
 
 # Add middleware to log all requests
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     logger.info(f"📥 {request.method} {request.url.path}")
-    logger.debug(f"Headers: {dict(request.headers)}")
 
-    # Log body for POST/PUT requests
-    if request.method in ["POST", "PUT"]:
-        try:
-            body = await request.body()
-            if body:
-                logger.debug(f"Body: {body[:500]}")  # Log first 500 chars
-        except Exception as e:
-            logger.debug(f"Could not log body: {e}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Headers: %s", dict(request.headers))
+
+        # Log body for small POST/PUT requests; without a Content-Length the size is unknown
+        if request.method in ("POST", "PUT") and not request.url.path.startswith(_NO_BODY_LOG_PREFIXES):
+            try:
+                content_length = int(request.headers.get("content-length", ""))
+            except ValueError:
+                content_length = None
+            if content_length is not None and content_length < LOG_BODY_MAX_BYTES:
+                try:
+                    body = await request.body()
+                    if body:
+                        logger.debug("Body: %s", body[:500])  # Log first 500 chars
+                except Exception as e:
+                    logger.debug(f"Could not log body: {e}")
 
     response = await call_next(request)
 
@@ -105,6 +249,14 @@ class ErrorCluster(BaseModel):
     count: int
     trace: str
 
+# Cluster lists can run to megabytes of traces; pydantic-core validates and writes the
+# JSON in one pass, rather than building dicts for the stdlib encoder
+_error_clusters = TypeAdapter(List[ErrorCluster])
+
+
+def _clusters_response(errors):
+    return Response(_error_clusters.dump_json(_error_clusters.validate_python(errors)), media_type="application/json")
+
 class AnalyzeRequest(BaseModel):
     log_content: str
 
@@ -129,6 +281,17 @@ class PullRequestRequest(BaseModel):
 class CancelRequest(BaseModel):
     job_id: str
 
+class ChunkedUploadInitRequest(BaseModel):
+    total_size: int
+    part_size: int
+    filename: Optional[str] = None
+
+class ChunkedUploadCompleteRequest(BaseModel):
+    upload_id: str
+
+class ChunkedUploadAbortRequest(BaseModel):
+    upload_id: str
+
 # --- Endpoints ---
 
 @app.get("/config", response_model=ConfigResponse)
@@ -154,110 +317,360 @@ def get_queue(repo_path: Optional[str] = None):
     If repo_path is provided, returns jobs for that specific repo.
     Otherwise returns all jobs.
     """
-    if repo_path:
-        return {"repo": repo_path, "jobs": job_registry.get(repo_path, [])}
-    
-    # Return all
-    return {
-        "queues": {k: v for k, v in job_registry.items()}
-    }
+    with _job_registry_lock:
+        if repo_path:
+            return {"repo": repo_path, "jobs": list(job_registry.get(repo_path, {}).values())}
+
+        # Return all
+        return {
+            "queues": {k: list(v.values()) for k, v in job_registry.items()}
+        }
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit, miss and eviction counts for the in-memory parse result cache."""
+    return {**_parse_result_stats, "size": len(_parse_results), "capacity": PARSE_RESULT_CACHE_SIZE}
+
+# Temp locations uploads are written to and cleanup may delete from, resolved once at import
+_TMPDIR = tempfile.gettempdir()
+# Symlinks resolved, so cleanup can compare real paths against them
+_TEMP_ROOTS = tuple({os.path.realpath('/tmp'), os.path.realpath(_TMPDIR)})
+
+def _is_inside_temp_dir(real_path):
+    return any(
+        real_path != root and os.path.commonpath([real_path, root]) == root
+        for root in _TEMP_ROOTS
+    )
+
+# Extensions kept on uploaded temp files; anything else is saved as .log
+_LOG_SUFFIXES = frozenset({'.log', '.txt', '.out'})
+
+# Bytes moved per copy call when saving an upload; tunable per deployment
+UPLOAD_CHUNK_BYTES = int(os.environ.get("CODEMEDIC_UPLOAD_CHUNK_BYTES", 16 * 1024 * 1024))
+
+def _upload_suffix(filename):
+    suffix = os.path.splitext(filename)[1] if filename else '.log'
+    return suffix if suffix in _LOG_SUFFIXES else '.log'
+
+def _copy_upload(src, dst):
+    """
+    Copy an UploadFile's spooled file into dst without a Python-level read loop.
+    Uploads past the spool limit already live in a real temp file, so the kernel
+    copies them with sendfile; fileno() rolls a small in-memory spool (at most the
+    spool limit) to disk first. Anything without a descriptor goes through copyfileobj.
+    """
+    src.seek(0)
+    try:
+        src_fd = src.fileno()
+    except (OSError, io.UnsupportedOperation):
+        shutil.copyfileobj(src, dst, UPLOAD_CHUNK_BYTES)
+        dst.flush()
+        return
+    size = os.fstat(src_fd).st_size
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(dst.fileno(), src_fd, offset, min(size - offset, UPLOAD_CHUNK_BYTES))
+        if sent == 0:
+            break
+        offset += sent
 
 @app.post("/logs/upload")
 async def upload_log_file(file: UploadFile = File(...)):
     """Upload a log file to temp directory and return the path."""
     try:
-        # Create a temporary file in /tmp
-        suffix = os.path.splitext(file.filename)[1] if file.filename else '.log'
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, mode='wb', dir='/tmp')
+        # Create a temporary file in /tmp; a plain mkstemp descriptor, since the file is
+        # kept past the request and NamedTemporaryFile's wrapper would go unused
+        fd, temp_path = tempfile.mkstemp(suffix=_upload_suffix(file.filename), dir='/tmp')
+    except Exception as e:
+        logger.error("upload: failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
 
-        print(f"[upload] Uploading file: {file.filename}")
-        print(f"[upload] Temp file created at: {temp_file.name}")
+    logger.debug("upload: %s -> %s", file.filename, temp_path)
+    try:
+        with open(fd, 'wb') as temp_file:
+            # Copy the spooled upload to the temp location off the event loop
+            await asyncio.to_thread(_copy_upload, file.file, temp_file)
+            file_size = os.fstat(fd).st_size
+    except Exception as e:
+        logger.error("upload: failed: %s", e)
+        # Don't leave a partial copy behind
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
 
-        # Write uploaded file to temp location in chunks (handle large files)
-        chunk_size = 1024 * 1024  # 1MB chunks
-        total_bytes = 0
-        while True:
-            chunk = await file.read(chunk_size)
-            if not chunk:
-                break
-            temp_file.write(chunk)
-            total_bytes += len(chunk)
+    logger.debug("upload: complete, %d bytes on disk", file_size)
+    return {
+        "temp_path": temp_path,
+        "original_filename": file.filename,
+        "size": file_size
+    }
 
-        temp_file.close()
+# Chunked uploads for very large logs: the client sends fixed-size parts, possibly in
+# parallel over several connections, and each one is written at its own offset
+# into a file preallocated on init. Parts are held in memory one at a time, so
+# their size is capped.
+MAX_UPLOAD_PART_BYTES = 256 * 1024 * 1024
+# Space preallocated by unfinished chunked uploads, all together; init reserves the
+# whole file up front, so without a cap a few requests could fill /tmp
+MAX_CHUNKED_UPLOAD_BYTES = int(os.environ.get("CODEMEDIC_MAX_CHUNKED_UPLOAD_BYTES", 16 * 1024 ** 3))
+# Uploads with no init or part for this long are dropped, file and all
+CHUNKED_UPLOAD_TTL = 3600
 
-        file_size = os.path.getsize(temp_file.name)
-        print(f"[upload] Upload complete: {total_bytes} bytes written")
-        print(f"[upload] File exists after close: {os.path.exists(temp_file.name)}")
-        print(f"[upload] File size on disk: {file_size} bytes")
+# upload_id -> {"fd", "path", "filename", "total_size", "part_size",
+#               "parts": {index: blake2b digest}, "writing": parts being written,
+#               "closed": set once complete or abort takes the upload, "touched": last activity}
+# Only touched on the event loop, so checking "closed" and counting a write can't interleave
+# with complete or abort closing the descriptor.
+_chunked_uploads: dict[str, dict] = {}
 
-        return {
-            "temp_path": temp_file.name,
-            "original_filename": file.filename,
-            "size": file_size
-        }
-    except Exception as e:
-        print(f"[upload] ERROR: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
+
+def _write_upload_part(fd, data, offset):
+    """pwrite one part at its offset and return its digest (hashed while the data is at hand)."""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _discard_upload_file(upload):
+    """Close an abandoned upload's descriptor and delete its file; call once no write is in progress."""
+    os.close(upload["fd"])
+    try:
+        os.remove(upload["path"])
+    except FileNotFoundError:
+        pass
+
+
+def _drop_upload(upload_id):
+    """Take an unfinished upload out of use; its file goes once the last write in progress ends."""
+    upload = _chunked_uploads.pop(upload_id)
+    upload["closed"] = True
+    if not upload["writing"]:
+        _discard_upload_file(upload)
+
+
+def _expire_uploads():
+    now = time.monotonic()
+    for upload_id in [k for k, u in _chunked_uploads.items() if now - u["touched"] > CHUNKED_UPLOAD_TTL]:
+        logger.info(f"🧹 Dropping abandoned chunked upload {upload_id}")
+        _drop_upload(upload_id)
+
+
+def _open_chunked_upload(filename, total_size):
+    fd, path = tempfile.mkstemp(suffix=_upload_suffix(filename), dir='/tmp')
+    try:
+        if total_size:
+            # Reserve the blocks up front so parallel parts don't fragment the file
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, total_size)
+            else:
+                os.ftruncate(fd, total_size)
+    except OSError:
+        os.close(fd)
+        os.remove(path)
+        raise
+    return fd, path
+
+
+@app.post("/logs/upload/init")
+async def init_chunked_upload(request: ChunkedUploadInitRequest):
+    """Start a chunked upload: preallocate the temp file and return its upload_id."""
+    if request.total_size < 0 or not 0 < request.part_size <= MAX_UPLOAD_PART_BYTES:
+        raise HTTPException(status_code=400, detail=f"part_size must be between 1 and {MAX_UPLOAD_PART_BYTES} bytes")
+
+    _expire_uploads()
+    reserved = sum(upload["total_size"] for upload in _chunked_uploads.values())
+    if reserved + request.total_size > MAX_CHUNKED_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Chunked uploads are limited to {MAX_CHUNKED_UPLOAD_BYTES} bytes in total; {reserved} are in use"
+        )
+
+    # Counted as reserved while the file is being allocated, so concurrent inits can't overshoot
+    upload_id = str(uuid.uuid4())
+    upload = {
+        "fd": None,
+        "path": None,
+        "filename": request.filename,
+        "total_size": request.total_size,
+        "part_size": request.part_size,
+        "parts": {},
+        "writing": 0,
+        "closed": True,
+        "touched": time.monotonic(),
+    }
+    _chunked_uploads[upload_id] = upload
+    try:
+        upload["fd"], upload["path"] = await asyncio.to_thread(_open_chunked_upload, request.filename, request.total_size)
+    except OSError as e:
+        del _chunked_uploads[upload_id]
+        raise HTTPException(status_code=500, detail=f"Failed to allocate upload: {e}")
+    upload["closed"] = False
+
+    part_count = -(-request.total_size // request.part_size)
+    logger.debug("upload: chunked %s started, %d bytes in %d part(s) at %s", upload_id, request.total_size, part_count, upload["path"])
+    return {"upload_id": upload_id, "part_count": part_count}
+
+
+def _open_upload(upload_id):
+    upload = _chunked_uploads.get(upload_id)
+    if upload is None or upload["closed"]:
+        raise HTTPException(status_code=404, detail=f"Unknown upload {upload_id}")
+    return upload
+
+
+@app.put("/logs/upload/part")
+async def upload_part(upload_id: str, part: int, request: Request):
+    """Receive one part of a chunked upload; the raw request body is the part's bytes."""
+    upload = _open_upload(upload_id)
+
+    offset = part * upload["part_size"]
+    if part < 0 or offset >= upload["total_size"]:
+        raise HTTPException(status_code=400, detail=f"Part {part} is out of range")
+    expected = min(upload["part_size"], upload["total_size"] - offset)
+
+    data = await request.body()
+    if len(data) != expected:
+        raise HTTPException(status_code=400, detail=f"Part {part} should be {expected} bytes, got {len(data)}")
+
+    # Complete or abort may have taken the upload while the body arrived; checked and
+    # counted with no await in between, so the descriptor stays open for this write
+    upload = _open_upload(upload_id)
+    upload["writing"] += 1
+    upload["touched"] = time.monotonic()
+    try:
+        upload["parts"][part] = await asyncio.to_thread(_write_upload_part, upload["fd"], data, offset)
+    finally:
+        upload["writing"] -= 1
+        # Aborted or expired mid-write: the last writer out removes the file
+        # (complete never takes an upload with a write in progress)
+        if upload["closed"] and not upload["writing"]:
+            _discard_upload_file(upload)
+    return {"upload_id": upload_id, "part": part, "received": len(upload["parts"])}
+
+
+@app.post("/logs/upload/complete")
+async def complete_chunked_upload(request: ChunkedUploadCompleteRequest):
+    """Finish a chunked upload once every part has arrived; returns the same fields as /logs/upload."""
+    _expire_uploads()
+    upload = _open_upload(request.upload_id)
+
+    part_count = -(-upload["total_size"] // upload["part_size"])
+    missing = [index for index in range(part_count) if index not in upload["parts"]]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing parts: {missing[:20]}")
+    if upload["writing"]:
+        raise HTTPException(status_code=409, detail="Parts are still being written; retry complete")
+
+    # Marked closed before the descriptor goes, so a part that is still arriving is refused
+    upload["closed"] = True
+    del _chunked_uploads[request.upload_id]
+    os.close(upload["fd"])
+    # Digest of the ordered part digests, so the file is never re-read to checksum it
+    digest = hashlib.blake2b(b"".join(upload["parts"][index] for index in range(part_count)), digest_size=16)
+    logger.debug("upload: chunked %s complete, %d bytes at %s", request.upload_id, upload['total_size'], upload['path'])
+    return {
+        "temp_path": upload["path"],
+        "original_filename": upload["filename"],
+        "size": upload["total_size"],
+        "digest": digest.hexdigest()
+    }
+
+
+@app.post("/logs/upload/abort")
+async def abort_chunked_upload(request: ChunkedUploadAbortRequest):
+    """Give up on a chunked upload and delete its temp file."""
+    _open_upload(request.upload_id)
+    _drop_upload(request.upload_id)
+    return {"message": "Upload aborted"}
+
+# Pasted logs are parsed from one in-memory string (and hashed for the cache);
+# anything bigger should come in as a file, which is streamed from disk
+MAX_INLINE_LOG_CHARS = 4 * 1024 * 1024
 
 @app.post("/logs/analyze", response_model=List[ErrorCluster])
-def analyze_logs(request: AnalyzeRequest):
+async def analyze_logs(request: AnalyzeRequest):
     """Parse log content and return clusters."""
-    if not request.log_content or not request.log_content.strip():
+    content = request.log_content
+    # isspace() stops at the first non-space character and, unlike strip(), never copies
+    if not content or content.isspace():
         raise HTTPException(status_code=400, detail="Log content is empty")
+    if len(content) > MAX_INLINE_LOG_CHARS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Log content is over {MAX_INLINE_LOG_CHARS} characters; upload it as a file via /logs/upload"
+        )
 
-    errors = agent.parse_log_content(request.log_content)
-    return errors
+    key = ("content", hashlib.blake2b(content.encode(), digest_size=16).digest())
+    errors = _cached_parse_result(key)
+    if errors is None:
+        errors = await asyncio.shield(_parse_once(key, agent.parse_log_content, content))
+    return _clusters_response(errors)
 
 @app.post("/logs/analyze_file", response_model=List[ErrorCluster])
-def analyze_log_file(file_path: str = Body(..., embed=True)):
+async def analyze_log_file(file_path: str = Body(..., embed=True)):
     """Parse log file from path and return clusters."""
-    print(f"[analyze_log_file] Request received for file: {file_path}")
-    print(f"[analyze_log_file] File exists: {os.path.exists(file_path)}")
-
-    if not os.path.exists(file_path):
-        print(f"[analyze_log_file] ERROR: File not found at {file_path}")
-        # List temp directory to debug
-        import glob
-        temp_files = glob.glob(os.path.join(tempfile.gettempdir(), "tmp*"))
-        print(f"[analyze_log_file] Temp directory has {len(temp_files)} tmp files")
-        if temp_files:
-            print(f"[analyze_log_file] First few temp files: {temp_files[:5]}")
+    logger.debug("analyze_log_file: %s", file_path)
+
+    # One stat both checks existence and gives the cache key below
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        logger.warning("Log file missing: %s", file_path)
         raise HTTPException(status_code=404, detail=f"Log file not found at {file_path}")
 
     # Don't delete temp file here - keep it for re-analysis
-    print(f"[analyze_log_file] Starting analysis...")
-    errors = agent.parse_log_clusters(file_path)
-    print(f"[analyze_log_file] Analysis complete, found {len(errors)} error clusters")
-    return errors
+    # The worker process reads the file itself, so neither the read nor the parse blocks the event loop
+    # agent's own call coalescing is per process, so identical requests are joined here instead;
+    # mtime and size in the key make any change to the file miss the result cache
+    key = (file_path, st.st_mtime_ns, st.st_size)
+    errors = _cached_parse_result(key)
+    if errors is None:
+        try:
+            errors = await asyncio.shield(_parse_once(key, agent.parse_log_clusters, file_path))
+        except FileNotFoundError:
+            # Deleted between the stat above and the worker opening it
+            logger.warning("Log file missing: %s", file_path)
+            raise HTTPException(status_code=404, detail=f"Log file not found at {file_path}")
+    logger.debug("analyze_log_file: found %d error clusters", len(errors))
+    return _clusters_response(errors)
 
 @app.post("/logs/cleanup")
 def cleanup_temp_file(file_path: str = Body(..., embed=True)):
     """Clean up a temporary log file."""
-    print(f"[cleanup] Request to cleanup: {file_path}")
-    # Allow cleanup of files in /tmp or system temp directory
-    is_temp_file = file_path and (file_path.startswith('/tmp/') or file_path.startswith(tempfile.gettempdir()))
+    logger.debug("cleanup: %s", file_path)
+    # Allow cleanup of files in /tmp or system temp directory. The real path is checked,
+    # so neither ../ segments nor symlinks can point the delete outside them
+    if file_path:
+        file_path = os.path.realpath(file_path)
+    is_temp_file = file_path and _is_inside_temp_dir(file_path)
     if is_temp_file:
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"[cleanup] File deleted: {file_path}")
-                return {"message": "Temp file cleaned up"}
-            else:
-                print(f"[cleanup] File does not exist: {file_path}")
-                return {"message": "File already deleted"}
+            # Removing straight away tells a missing file apart without a separate stat
+            os.remove(file_path)
+            agent.drop_parse_cache(file_path)
+            logger.debug("cleanup: deleted %s", file_path)
+            return {"message": "Temp file cleaned up"}
+        except FileNotFoundError:
+            logger.debug("cleanup: %s already deleted", file_path)
+            return {"message": "File already deleted"}
         except Exception as e:
-            print(f"[cleanup] ERROR: {str(e)}")
+            logger.error("cleanup: failed: %s", e)
             raise HTTPException(status_code=500, detail=f"Failed to cleanup: {str(e)}")
-    print(f"[cleanup] Not a temp file, skipping cleanup")
+    logger.debug("cleanup: not a temp file, skipping")
     return {"message": "No cleanup needed"}
 
 @app.post("/repo/sync")
-def sync_repo(request: RepoRequest):
+async def sync_repo(request: RepoRequest):
     """Checkout master and pull."""
     logger.info(f"Syncing repo: {request.repo_path}")
     
     with track_job(request.repo_path, "sync", "Syncing repository"):
-        success, msg = agent.prepare_repo(request.repo_path)
+        success, msg = await _run_repo_task(request.repo_path, agent.prepare_repo)
         if success:
             logger.info(f"Repo sync successful: {msg}")
         else:
@@ -265,27 +678,50 @@ def sync_repo(request: RepoRequest):
             raise HTTPException(status_code=500, detail=msg)
     return {"message": msg}
 
+# Read size when streaming a spooled diff
+DIFF_CHUNK_BYTES = 64 * 1024
+
+
+def _iter_spool(spool):
+    """Yield a spooled file in DIFF_CHUNK_BYTES pieces, closing (and so deleting) it at the end."""
+    with spool:
+        while chunk := spool.read(DIFF_CHUNK_BYTES):
+            yield chunk
+
 @app.get("/repo/diff")
-def get_diff(repo_path: str):
-    """Get current git diff."""
-    return {"diff": agent.get_git_diff(repo_path)}
+async def get_diff(repo_path: str, request: Request):
+    """
+    Get current git diff.
+    The format follows a substring match on the Accept header: any Accept that mentions
+    application/json (axios, and so the frontend, always sends it) gets {"diff": ...};
+    everything else, including */* from curl or fetch, gets the raw diff streamed as
+    text/x-diff, with a 500 if git fails.
+    """
+    if "application/json" in request.headers.get("accept", ""):
+        return {"diff": await _run_git_task(agent.get_git_diff, repo_path)}
+    # git runs to completion into a temp file under the repo lock; the (possibly slow)
+    # transfer to the client happens after the lock is released
+    success, spool = await _run_git_task(agent.spool_git_diff, repo_path)
+    if not success:
+        raise HTTPException(status_code=500, detail=spool)
+    return StreamingResponse(_iter_spool(spool), media_type="text/x-diff")
 
 @app.post("/repo/discard")
-def discard_changes(request: RepoRequest):
+async def discard_changes(request: RepoRequest):
     """Discard changes in repo."""
-    success, msg = agent.discard_changes(request.repo_path)
+    success, msg = await _run_repo_task(request.repo_path, agent.discard_changes)
     if not success:
         raise HTTPException(status_code=500, detail=msg)
     return {"message": msg}
 
 @app.post("/repo/commit")
-def commit_changes(request: CommitRequest):
+async def commit_changes(request: CommitRequest):
     """Commit changes."""
     logger.info(f"Committing changes to repo: {request.repo_path}")
     logger.debug(f"Commit message: {request.message[:100]}")
     
     with track_job(request.repo_path, "commit", f"Committing: {request.message[:50]}"):
-        success, msg = agent.run_git_commands(request.repo_path, request.message)
+        success, msg = await _run_repo_task(request.repo_path, agent.run_git_commands, request.message)
         if success:
             logger.info(f"Commit successful: {msg}")
         else:
@@ -294,12 +730,12 @@ def commit_changes(request: CommitRequest):
     return {"message": msg}
 
 @app.post("/repo/push")
-def push_branch(request: RepoRequest):
+async def push_branch(request: RepoRequest):
     """Push current branch to remote origin."""
     logger.info(f"Pushing branch for repo: {request.repo_path}")
     
     with track_job(request.repo_path, "push", "Pushing branch"):
-        success, msg = agent.push_branch(request.repo_path)
+        success, msg = await _push_branch(request.repo_path)
         if success:
             logger.info(f"Push successful: {msg}")
         else:
@@ -308,21 +744,21 @@ def push_branch(request: RepoRequest):
     return {"message": msg}
 
 @app.post("/repo/commit-and-push")
-def commit_and_push(request: CommitRequest):
+async def commit_and_push(request: CommitRequest):
     """Commit changes and push to remote in one operation."""
     logger.info(f"🚀 One-click commit and push for repo: {request.repo_path}")
     logger.debug(f"Commit message: {request.message[:100]}")
 
     with track_job(request.repo_path, "commit_push", f"Commit & Push: {request.message[:50]}"):
         # First commit
-        commit_success, commit_msg = agent.run_git_commands(request.repo_path, request.message)
+        commit_success, commit_msg = await _run_repo_task(request.repo_path, agent.run_git_commands, request.message)
         if not commit_success:
             logger.error(f"Commit failed: {commit_msg}")
             raise HTTPException(status_code=500, detail=f"Commit failed: {commit_msg}")
         logger.info(f"✅ Commit successful: {commit_msg}")
 
         # Then push
-        push_success, push_msg = agent.push_branch(request.repo_path)
+        push_success, push_msg = await _push_branch(request.repo_path)
         if not push_success:
             logger.error(f"Push failed: {push_msg}")
             raise HTTPException(status_code=500, detail=f"Push failed: {push_msg}")
@@ -335,7 +771,7 @@ def commit_and_push(request: CommitRequest):
         }
 
 @app.post("/repo/commit-push-and-pr")
-def commit_push_and_pr(request: CommitRequest):
+async def commit_push_and_pr(request: CommitRequest):
     """Commit changes, push to remote, and create PR in one operation."""
     logger.info(f"🚀 One-click commit, push & PR for repo: {request.repo_path}")
     logger.debug(f"Commit message: {request.message[:100]}")
@@ -352,7 +788,7 @@ def commit_push_and_pr(request: CommitRequest):
             push_msg = f"Branch {branch_name} already pushed to origin"
         else:
             # Check if we're on a worktree-created branch that's already pushed
-            is_ready, branch_name = agent.is_worktree_branch_ready(request.repo_path)
+            is_ready, branch_name = await _run_git_task(agent.is_worktree_branch_ready, request.repo_path)
 
             if is_ready:
                 logger.info(f"✅ Branch {branch_name} is already committed and pushed (worktree flow). Skipping to PR creation.")
@@ -361,7 +797,7 @@ def commit_push_and_pr(request: CommitRequest):
             else:
                 # Standard flow: commit and push first
                 # First commit
-                commit_success, commit_msg = agent.run_git_commands(request.repo_path, request.message)
+                commit_success, commit_msg = await _run_repo_task(request.repo_path, agent.run_git_commands, request.message)
                 if not commit_success:
                     logger.error(f"Commit failed: {commit_msg}")
                     raise HTTPException(status_code=500, detail=f"Commit failed: {commit_msg}")
@@ -370,7 +806,7 @@ def commit_push_and_pr(request: CommitRequest):
                 branch_name = agent.get_current_branch(request.repo_path)
 
                 # Then push
-                push_success, push_msg = agent.push_branch(request.repo_path)
+                push_success, push_msg = await _push_branch(request.repo_path)
                 if not push_success:
                     logger.error(f"Push failed: {push_msg}")
                     raise HTTPException(status_code=500, detail=f"Push failed: {push_msg}")
@@ -378,7 +814,7 @@ def commit_push_and_pr(request: CommitRequest):
 
         # Finally create PR using the specific branch name
         pr_title = request.message[:100]  # Use commit message as PR title
-        pr_success, pr_msg, pr_url = agent.create_pull_request(request.repo_path, pr_title, branch_name=branch_name)
+        pr_success, pr_msg, pr_url = await agent.create_pull_request_async(request.repo_path, pr_title, branch_name=branch_name)
         if not pr_success:
             logger.error(f"PR creation failed: {pr_msg}")
             raise HTTPException(status_code=500, detail=f"PR creation failed: {pr_msg}")
@@ -393,9 +829,9 @@ def commit_push_and_pr(request: CommitRequest):
         }
 
 @app.post("/repo/create-pr")
-def create_pull_request(request: PullRequestRequest):
+async def create_pull_request(request: PullRequestRequest):
     """Create a pull request using GitHub CLI."""
-    success, msg, pr_url = agent.create_pull_request(
+    success, msg, pr_url = await agent.create_pull_request_async(
         request.repo_path,
         request.title,
         request.body
@@ -404,29 +840,153 @@ def create_pull_request(request: PullRequestRequest):
         raise HTTPException(status_code=500, detail=msg)
     return {"message": msg, "pr_url": pr_url}
 
-@app.post("/fix/start")
-def start_fix(request: FixRequest):
-    """Trigger OpenCode analysis with streaming output."""
-    logger.info(f"🔧 Starting fix for repo: {request.repo_path}")
-    logger.debug(f"Model: {request.model}")
-    logger.debug(f"Error trace length: {len(request.error_trace)} chars")
-    logger.debug(f"First 200 chars of error: {request.error_trace[:200]}")
+# Output lines are coalesced into one SSE write per batch: up to SSE_BATCH_LINES
+# lines or SSE_BATCH_CHARS characters, or whatever arrived within SSE_BATCH_WINDOW
+# seconds of the first one. The final result is never held back.
+SSE_BATCH_LINES = 16
+SSE_BATCH_CHARS = 8192
+SSE_BATCH_WINDOW = 0.05
+
+async def _batched(items, max_items=SSE_BATCH_LINES, max_chars=SSE_BATCH_CHARS, window=SSE_BATCH_WINDOW):
+    """
+    Regroup an async iterator into lists, read ahead through an asyncio.Queue.
+    Strings count towards max_chars; any other item ends its batch at once.
+    """
+    queue = asyncio.Queue()
+    end = object()
+
+    async def pump():
+        try:
+            async for item in items:
+                queue.put_nowait(item)
+        except Exception as e:
+            queue.put_nowait((end, e))
+        else:
+            queue.put_nowait((end, None))
+
+    producer = asyncio.create_task(pump())
+    loop = asyncio.get_running_loop()
+    try:
+        batch = []
+        chars = 0
+        while True:
+            if batch:
+                timeout = deadline - loop.time()
+                if (len(batch) >= max_items or chars >= max_chars or timeout <= 0
+                        or not isinstance(batch[-1], str)):
+                    yield batch
+                    batch = []
+                    chars = 0
+                    continue
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except TimeoutError:
+                    continue
+            else:
+                item = await queue.get()
+                deadline = loop.time() + window
+
+            if isinstance(item, tuple) and item and item[0] is end:
+                if batch:
+                    yield batch
+                if item[1] is not None:
+                    raise item[1]
+                return
+            batch.append(item)
+            if isinstance(item, str):
+                chars += len(item)
+    finally:
+        # Client gone or stream finished: stop reading and let the source clean up
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+class _FixRun:
+    """
+    One OpenCode fix, streamed to every /fix/start request that asked for it.
+    Every SSE chunk is kept, so a subscriber that joins late is first sent what it missed.
+    """
+
+    def __init__(self, key, job_id):
+        self.key = key
+        self.job_id = job_id
+        self.chunks = []
+        self.done = False
+        self.subscribers = 0
+        self.task = None
+        self._changed = asyncio.Event()
 
-    # Generate job_id upfront so we can send it to client and use for cancellation
-    job_id = str(uuid.uuid4())
+    def _publish(self):
+        # Wake everyone waiting on the current event and hand out a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
 
-    def generate():
-        line_count = 0
+    async def produce(self, events):
         try:
-            logger.info(f"Starting opencode process with job_id: {job_id}")
+            async for chunk in events:
+                self.chunks.append(chunk)
+                self._publish()
+        except Exception:
+            # _fix_events has already logged it and queued the failure event
+            pass
+        finally:
+            await events.aclose()
+            self.done = True
+            self._publish()
+            if _inflight_fixes.get(self.key) is self:
+                del _inflight_fixes[self.key]
 
-            # Send job_id as first event so client can use it for cancellation
-            yield f"event: job_id\ndata: {job_id}\n\n"
+    async def subscribe(self):
+        self.subscribers += 1
+        sent = 0
+        try:
+            while True:
+                if sent < len(self.chunks):
+                    # Anything that piled up since the last write goes out as one
+                    chunk = "".join(self.chunks[sent:])
+                    sent = len(self.chunks)
+                    yield chunk
+                elif self.done:
+                    return
+                else:
+                    await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            # Last client gone: stop OpenCode, as a single client disconnecting always has
+            if not self.subscribers and not self.done:
+                if _inflight_fixes.get(self.key) is self:
+                    del _inflight_fixes[self.key]
+                self.task.cancel()
+
+# Keep proxies (nginx's X-Accel-Buffering) and caches from holding the stream back
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Fix runs in progress by request hash, so a double-click or a second tab asking for
+# the same fix joins the running OpenCode process instead of starting another
+_inflight_fixes: dict[str, _FixRun] = {}
+
+
+def _fix_key(request: FixRequest):
+    data = "\0".join((request.repo_path, request.model or "", request.error_trace))
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
 
-            # Track job inside the generator (pass job_id for consistency)
-            with track_job(request.repo_path, "fix", f"Applying AI Fix (job: {job_id})"):
-                # Iterate over generator - pass job_id for process registration
-                for item in agent.run_opencode_fix(request.repo_path, request.error_trace, job_id=job_id, model=request.model):
+
+async def _fix_events(request: FixRequest, job_id: str):
+    """The SSE stream of one fix run."""
+    line_count = 0
+    try:
+        logger.info(f"Starting opencode process with job_id: {job_id}")
+
+        # Send job_id as first event so client can use it for cancellation
+        yield f"event: job_id\ndata: {job_id}\n\n"
+
+        # Track job inside the generator (pass job_id for consistency)
+        with track_job(request.repo_path, "fix", f"Applying AI Fix (job: {job_id})"):
+            # Iterate over generator - pass job_id for process registration
+            # Lines arrive in batches; each batch goes out as one write of consecutive events
+            fix_items = agent.run_opencode_fix_async(request.repo_path, request.error_trace, job_id=job_id, model=request.model)
+            async for batch in _batched(fix_items):
+                events = []
+                for item in batch:
                     line_count += 1
                     if isinstance(item, tuple):
                         # Tuple can be (success, msg) or (success, msg, branch_name)
@@ -444,23 +1004,44 @@ def start_fix(request: FixRequest):
                             "job_id": job_id,
                             "branch_name": branch_name
                         })
-                        yield f"event: complete\ndata: {result_data}\n\n"
+                        events.append(f"event: complete\ndata: {result_data}\n\n")
                     else:
                         # Log line event
                         logger.debug(f"OpenCode output: {item[:100]}")
-                        # Sanitize newlines to ensure SSE format
-                        safe_line = item.replace('\n', ' ')
-                        yield f"data: {safe_line}\n\n"
+                        # Sanitize newlines (\r ends an SSE line too) to ensure SSE format.
+                        # Two replaces: str.translate with a mapping table goes char by
+                        # char through the table, and for non-ASCII lines that is far slower
+                        safe_line = item.replace("\n", " ").replace("\r", " ")
+                        events.append(f"data: {safe_line}\n\n")
+                yield "".join(events)
 
-            logger.info(f"Stream ended. Total lines: {line_count}")
-        except Exception as e:
-            logger.error(f"Error in generate(): {e}", exc_info=True)
-            # If we crash, we might want to yield an error event
-            err_data = json.dumps({"success": False, "message": str(e), "job_id": job_id})
-            yield f"event: complete\ndata: {err_data}\n\n"
-            raise
+        logger.info(f"Stream ended. Total lines: {line_count}")
+    except Exception as e:
+        logger.error(f"Error in generate(): {e}", exc_info=True)
+        # If we crash, we might want to yield an error event
+        err_data = json.dumps({"success": False, "message": str(e), "job_id": job_id})
+        yield f"event: complete\ndata: {err_data}\n\n"
+        raise
+
+@app.post("/fix/start")
+async def start_fix(request: FixRequest):
+    """Trigger OpenCode analysis with streaming output."""
+    logger.info(f"🔧 Starting fix for repo: {request.repo_path}")
+    logger.debug(f"Model: {request.model}")
+    logger.debug(f"Error trace length: {len(request.error_trace)} chars")
+    logger.debug(f"First 200 chars of error: {request.error_trace[:200]}")
+
+    key = _fix_key(request)
+    run = _inflight_fixes.get(key)
+    if run is None:
+        # Generate job_id upfront so we can send it to client and use for cancellation
+        run = _FixRun(key, secrets.token_hex(8))
+        _inflight_fixes[key] = run
+        run.task = asyncio.create_task(run.produce(_fix_events(request, run.job_id)))
+    else:
+        logger.info(f"🔁 Same fix already running, joining job: {run.job_id}")
 
-    return StreamingResponse(generate(), media_type="text/event-stream")
+    return StreamingResponse(run.subscribe(), media_type="text/event-stream", headers=_SSE_HEADERS)
 
 @app.post("/fix/cancel")
 def cancel_fix(request: CancelRequest):
@@ -473,10 +1054,14 @@ def cancel_fix(request: CancelRequest):
 if __name__ == "__main__":
     import uvicorn
     logger.info("🚀 Starting CodeMedic API server on http://0.0.0.0:8000")
+    # One worker process: fix cancellation, chunked uploads, the job queue and the parse
+    # caches all live in this process, so a second worker would see none of them. CPU-bound
+    # parsing already runs on its own process pool. log_requests already logs every
+    # request, so uvicorn's access log would only repeat it.
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=8000,
-        log_level="debug",
-        access_log=True
+        log_level=LOG_LEVEL.lower(),
+        access_log=False
     )